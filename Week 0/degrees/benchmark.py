@@ -0,0 +1,330 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from graph import CompactGraph
+from util import (Node, StackFrontier, QueueFrontier,
+                  IndexedStackFrontier, IndexedQueueFrontier)
+import stats
+
+
+def synthetic_data(people_count, movie_count, cast_size, seed):
+    """
+    Fills the degrees globals with a random cast graph, so searches
+    can be compared without the large IMDB dataset.
+    """
+    rng = random.Random(seed)
+    reset()
+
+    for i in range(people_count):
+        person_id = str(i)
+        degrees.people[person_id] = {
+            "name": f"Person {i}",
+            "birth": "",
+            "movies": set()
+        }
+        degrees.names[f"person {i}"] = {person_id}
+
+    # Each cast has one lead drawn towards a few popular people,
+    # like real actor graphs, and a supporting cast drawn uniformly
+    weights = list(itertools.accumulate(
+        1 / (rank + 1) for rank in range(people_count)
+    ))
+    for i in range(movie_count):
+        movie_id = f"m{i}"
+        cast = set(rng.choices(range(people_count), cum_weights=weights))
+        cast.update(rng.sample(range(people_count), cast_size - 1))
+        degrees.movies[movie_id] = {
+            "title": f"Movie {i}",
+            "year": "",
+            "stars": {str(person) for person in cast}
+        }
+        for person in cast:
+            degrees.people[str(person)]["movies"].add(movie_id)
+
+
+def reset():
+    """
+    Empties the degrees globals.
+    """
+    degrees.graph = None
+    degrees.names.clear()
+    degrees.people = {}
+    degrees.movies = {}
+
+
+def write_csv(directory):
+    """
+    Writes the loaded degrees globals as people, movies and stars CSV
+    files in directory.
+    """
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id, person in degrees.people.items():
+            writer.writerow([person_id, person["name"], person["birth"]])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id, movie in degrees.movies.items():
+            writer.writerow([movie_id, movie["title"], movie["year"]])
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id, movie in degrees.movies.items():
+            for person_id in movie["stars"]:
+                writer.writerow([person_id, movie_id])
+
+
+def load(args):
+    """
+    Loads the dataset named by the arguments.
+    """
+    if args.directory:
+        reset()
+        degrees.load_data(args.directory, compact=args.compact)
+    else:
+        synthetic_data(args.people, args.movies, args.cast, args.seed)
+        if args.compact:
+            degrees.use_graph(
+                CompactGraph.from_dicts(degrees.people, degrees.movies)
+            )
+
+
+def random_pairs(count, seed):
+    """
+    Returns random (source, target) pairs of person ids who
+    starred in at least one movie.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(person_id for person_id, person
+                        in degrees.people.items() if person["movies"])
+    return [(rng.choice(person_ids), rng.choice(person_ids))
+            for _ in range(count)]
+
+
+def check_path(source, target, path):
+    """
+    Raises an exception if path does not connect source to target.
+    """
+    state = source
+    for movie_id, person_id in path:
+        stars = degrees.movies[movie_id]["stars"]
+        if state not in stars or person_id not in stars:
+            raise Exception(f"invalid step {movie_id} from {state}")
+        state = person_id
+    if state != target:
+        raise Exception(f"path ends at {state}, not {target}")
+
+
+def counted(search, source, target):
+    """
+    Runs a search, returning its path, the number of people it
+    expanded and the time it took.
+    """
+    searches = []
+    stats.add_hook(searches.append)
+    try:
+        start = time.perf_counter()
+        path = search(source, target)
+        elapsed = time.perf_counter() - start
+    finally:
+        stats.remove_hook(searches.append)
+    expanded = sum(search_stats.neighbor_calls for search_stats in searches)
+    return path, expanded, elapsed
+
+
+def search_benchmark(args):
+    """
+    Compares node expansions of the breadth-first searches.
+    """
+    searches = [
+        ("bfs", degrees.shortest_path),
+        ("bidirectional", degrees.bidirectional_shortest_path)
+    ]
+    totals = {name: [0, 0.0] for name, _ in searches}
+
+    print(f"{'source':>10} {'target':>10} {'degrees':>7} "
+          + " ".join(f"{name:>14}" for name, _ in searches))
+    for source, target in random_pairs(args.queries, args.seed):
+        lengths = set()
+        counts = []
+        for name, search in searches:
+            path, expanded, elapsed = counted(search, source, target)
+            if path is not None:
+                check_path(source, target, path)
+            lengths.add(None if path is None else len(path))
+            counts.append(expanded)
+            totals[name][0] += expanded
+            totals[name][1] += elapsed
+        if len(lengths) != 1:
+            sys.exit(f"Searches disagree for {source} -> {target}: {lengths}")
+        length = lengths.pop()
+        print(f"{source:>10} {target:>10} {str(length):>7} "
+              + " ".join(f"{count:>14}" for count in counts))
+
+    print()
+    for name, (expanded, elapsed) in totals.items():
+        print(f"{name}: {expanded} people expanded in {elapsed:.3f}s")
+
+
+def drain(frontier_class, size):
+    """
+    Fills a frontier with size nodes and empties it again, checking
+    membership before every removal as a search does. Returns the
+    time taken.
+    """
+    start = time.perf_counter()
+    frontier = frontier_class()
+    for state in range(size):
+        frontier.add(Node(state=state, parent=None, action=None))
+    state = 0
+    while not frontier.empty():
+        frontier.contains_state(state)
+        frontier.remove()
+        state += 1
+    return time.perf_counter() - start
+
+
+def frontier_benchmark(args):
+    """
+    Compares how the list and indexed frontiers scale with size.
+    """
+    frontiers = [
+        ("StackFrontier", StackFrontier, args.list_limit),
+        ("QueueFrontier", QueueFrontier, args.list_limit),
+        ("IndexedStackFrontier", IndexedStackFrontier, args.size),
+        ("IndexedQueueFrontier", IndexedQueueFrontier, args.size)
+    ]
+
+    sizes = []
+    size = 1000
+    while size <= args.size:
+        sizes.append(size)
+        size *= 4
+
+    print(f"{'frontier':>22} " + " ".join(f"{size:>10}" for size in sizes))
+    for name, frontier_class, limit in frontiers:
+        timings = []
+        for size in sizes:
+            if size > limit:
+                timings.append(f"{'-':>10}")
+            else:
+                timings.append(f"{drain(frontier_class, size):>9.3f}s")
+        print(f"{name:>22} " + " ".join(timings))
+
+
+def measure(directory, compact):
+    """
+    Loads directory in one representation, returning the bytes it
+    keeps allocated and the time it took.
+    """
+    reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, elapsed
+
+
+def memory_benchmark(args):
+    """
+    Compares the memory held by the dict and compact representations.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = args.directory
+        if directory is None:
+            synthetic_data(args.people, args.movies, args.cast, args.seed)
+            write_csv(temporary)
+            directory = temporary
+
+        for name, compact in [("dicts", False), ("compact", True)]:
+            allocated, elapsed = measure(directory, compact)
+            print(f"{name:>8}: {allocated / 2 ** 20:8.2f} MiB "
+                  f"loaded in {elapsed:.3f}s")
+            if compact:
+                print(f"{'':>8}  {degrees.graph.nbytes() / 2 ** 20:8.2f} MiB "
+                      "of it in edge arrays")
+
+
+def snapshot_benchmark(args):
+    """
+    Compares a cold load from CSV files with a warm load from the
+    snapshot written by the cold load.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        synthetic_data(args.people, args.movies, args.cast, args.seed)
+        write_csv(temporary)
+
+        for name in ["cold", "warm"]:
+            reset()
+            start = time.perf_counter()
+            degrees.load_data(temporary, snapshot=True)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>5}: loaded in {elapsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="compare path searches")
+    search.add_argument("--directory",
+                        help="load a dataset instead of a synthetic graph")
+    search.add_argument("--people", type=int, default=4000)
+    search.add_argument("--movies", type=int, default=1500)
+    search.add_argument("--cast", type=int, default=4)
+    search.add_argument("--queries", type=int, default=20)
+    search.add_argument("--seed", type=int, default=50)
+    search.add_argument("--compact", action="store_true",
+                        help="search the compact graph")
+
+    memory = commands.add_parser("memory", help="compare graph memory")
+    memory.add_argument("--directory",
+                        help="load a dataset instead of a synthetic graph")
+    memory.add_argument("--people", type=int, default=200000)
+    memory.add_argument("--movies", type=int, default=60000)
+    memory.add_argument("--cast", type=int, default=4)
+    memory.add_argument("--seed", type=int, default=50)
+
+    frontier = commands.add_parser("frontier", help="compare frontiers")
+    frontier.add_argument("--size", type=int, default=1024000,
+                          help="largest frontier to drain")
+    frontier.add_argument("--list-limit", type=int, default=16000,
+                          help="largest frontier to drain with list frontiers")
+
+    snapshot = commands.add_parser("snapshot", help="compare cold and "
+                                   "warm loads with a snapshot")
+    snapshot.add_argument("--people", type=int, default=200000)
+    snapshot.add_argument("--movies", type=int, default=60000)
+    snapshot.add_argument("--cast", type=int, default=4)
+    snapshot.add_argument("--seed", type=int, default=50)
+
+    args = parser.parse_args()
+    if args.command == "search":
+        load(args)
+        search_benchmark(args)
+    elif args.command == "memory":
+        memory_benchmark(args)
+    elif args.command == "snapshot":
+        snapshot_benchmark(args)
+    else:
+        frontier_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
+import argparse
 import csv
+import json
+from collections import OrderedDict, deque
 from os import stat
 from sre_parse import State
+import os
 import sys
+import time
 from turtle import st
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks
+from graph import CompactGraph, cached_graph
+from nameindex import NameIndex
+from util import Node, IndexedQueueFrontier
+
+# stats.py lives in Week 0/shared, next to the tictactoe project
+SHARED_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "shared")
+if SHARED_DIRECTORY not in sys.path:
+    sys.path.insert(0, SHARED_DIRECTORY)
+import stats
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -15,10 +30,57 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, when loaded instead of the dicts above
+graph = None
+
+# Autocomplete and approximate name index, when loaded
+name_index = None
+
+# Number of breadth-first searches kept by batch mode
+SEARCH_CACHE_SIZE = 32
 
-def load_data(directory):
+
+def load_data(directory, compact=False, snapshot=False, fuzzy=False,
+              min_year=None, progress=None):
     """
     Load data from CSV files into memory.
+
+    If compact, streams the CSV files into integer-indexed arrays and
+    replaces people and movies with read-only views of them, keeping
+    only movies released since min_year and their stars if given, and
+    calling progress(file name, rows, seconds) as files are read. If
+    snapshot, the compact graph is memory-mapped from a binary snapshot
+    of the CSV files, which is written on the first run. If fuzzy, also
+    indexes names for autocomplete and approximate lookup.
+    """
+    if snapshot:
+        use_graph(cached_graph(directory, min_year, progress))
+    elif compact or min_year is not None:
+        use_graph(CompactGraph.from_csv(directory, min_year, progress))
+    else:
+        load_csv(directory)
+
+    if fuzzy:
+        index_names()
+
+
+def index_names():
+    """
+    Builds the name index over everyone loaded.
+    """
+    global name_index
+    if graph is not None:
+        entries = zip(graph.person_ids, graph.person_names,
+                      graph.person_births)
+    else:
+        entries = ((person_id, person["name"], person["birth"])
+                   for person_id, person in people.items())
+    name_index = NameIndex(entries)
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into the names, people and movies dicts.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -55,15 +117,83 @@ def load_data(directory):
                 pass
 
 
+def report_progress(name, rows, seconds):
+    """
+    Prints how far loading a CSV file has got.
+    """
+    rate = rows / seconds if seconds > 0 else 0
+    print(f"{name}: {rows} rows ({rate:.0f} rows/s)", file=sys.stderr)
+
+
+def use_graph(compact_graph):
+    """
+    Serves people, movies and neighbors from a compact graph.
+    """
+    global graph, people, movies
+    graph = compact_graph
+    people = graph.people
+    movies = graph.movies
+
+    names.clear()
+    for person_id, name in zip(graph.person_ids, graph.person_names):
+        names.setdefault(name.lower(), set()).add(person_id)
+
+
+def parse_args(argv):
+    """
+    Parses command line arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people and meet in the middle")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in integer-indexed arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="memory-map the compact graph from a snapshot")
+    parser.add_argument("--min-year", type=int,
+                        help="only load movies released since this year")
+    parser.add_argument("--progress", action="store_true",
+                        help="report rows read while loading")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="suggest people for names without an exact match")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="bound the separation with a landmark index "
+                             "and search with A*")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics to stderr")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer 'source,target' name pairs from FILE "
+                             "(- for stdin) as JSON lines")
+    parser.add_argument("--cache-size", type=int, default=SEARCH_CACHE_SIZE,
+                        help="searches kept between batch queries")
+    return parser.parse_args(argv)
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = parse_args(sys.argv[1:])
+    directory = args.directory
+
+    # Keep stdout for results when answering a batch
+    log = sys.stderr if args.batch else sys.stdout
+    if args.stats:
+        stats.add_hook(stats.print_stats)
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(directory, compact=args.compact or args.landmarks,
+              snapshot=args.snapshot, fuzzy=args.fuzzy,
+              min_year=args.min_year,
+              progress=report_progress if args.progress else None)
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.cache_size)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.cache_size)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -72,7 +202,20 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.landmarks:
+        index = landmarks.load_or_build(graph, directory,
+                                        min_year=args.min_year)
+        lower, upper = index.bounds(graph.person_index[source],
+                                    graph.person_index[target])
+        if lower is not None:
+            print(f"Landmarks: at least {lower}"
+                  + ("" if upper is None else f", at most {upper}")
+                  + " degrees of separation.")
+        path = index.shortest_path(source, target)
+    elif args.bidirectional:
+        path = bidirectional_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -86,6 +229,37 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+def search_neighbors():
+    """
+    Returns the function the searches call for the neighbors of a state.
+
+    With a compact graph loaded, states are person indices and actions
+    are movie indices, so no ids are built while searching. Otherwise
+    both are IMDB ids.
+    """
+    if graph is not None:
+        return graph.neighbors
+    return neighbors_for_person
+
+
+def state_for_person(person_id):
+    """Returns the search state of a person_id."""
+    if graph is not None:
+        return graph.person_index[person_id]
+    return person_id
+
+
+def path_ids(path):
+    """
+    Returns a path of (action, state) steps as (movie_id, person_id)
+    pairs, or None if there is no path.
+    """
+    if graph is None or path is None:
+        return path
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
 def find_path(node):
     """
     Returns path to parent node, reversed
@@ -114,10 +288,16 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    # Search on the states of the loaded graph, not on ids
+    neighbors = search_neighbors()
+    source = state_for_person(source)
+    target = state_for_person(target)
+
     # Initialize frontier to starting position
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
+    search_stats = stats.SearchStats("bfs")
 
     # Initialize empty explored set
     explored = set()
@@ -127,22 +307,26 @@ def shortest_path(source, target):
         
         # If nothing left in frontier, then no path to target found
         if frontier.empty():
+            search_stats.finish()
             return None
 
-        # Choose a node from the frontier using QueueFrontier
+        # Choose a node from the frontier using IndexedQueueFrontier
+        search_stats.expand(len(frontier.frontier))
         node = frontier.remove()
 
         # Check if state is target
         if node.state == target:
             # Return path list to target node
             path_to_parent = find_path(node)
-            return path_to_parent
+            search_stats.finish()
+            return path_ids(path_to_parent)
 
         # Add node to explored set
         explored.add(node.state)
 
         # Check every node added to the frontier if not already explored, ignoring duplicates
-        for action, state in neighbors_for_person(node.state):
+        search_stats.neighbor_calls += 1
+        for action, state in neighbors(node.state):
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state=state, parent=node, action=action)
 
@@ -150,19 +334,278 @@ def shortest_path(source, target):
                 if child.state == target:
                     # Return path list to target node
                     path_to_parent = find_path(child)
-                    return path_to_parent
+                    search_stats.finish()
+                    return path_ids(path_to_parent)
 
                 # Add new child to frontier
                 frontier.add(child)
 
 
+def expand_layer(frontier, parents, depths, other_depths, search_stats,
+                 neighbors):
+    """
+    Expands every person in one frontier layer, finding their
+    neighbors with the neighbors function.
+
+    Returns the next layer and the person where this search met the
+    search from the other side, or None if they did not meet.
+    """
+    next_layer = []
+    meet = None
+
+    for person_id in frontier:
+        search_stats.expand(len(frontier) + len(next_layer))
+        search_stats.neighbor_calls += 1
+        for action, state in neighbors(person_id):
+            if state in parents:
+                continue
+            parents[state] = (action, person_id)
+            depths[state] = depths[person_id] + 1
+            next_layer.append(state)
+
+            # Keep the meeting point closest to the other side's root
+            if state in other_depths:
+                if meet is None or other_depths[state] < other_depths[meet]:
+                    meet = state
+
+    return next_layer, meet
+
+
+def join_paths(meet, forward, backward):
+    """
+    Returns the path through the meeting person, combining the
+    forward parents (towards the source) and the backward parents
+    (towards the target).
+    """
+    # Follow forward parents back to the source
+    path = []
+    state = meet
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    # Follow backward parents on to the target
+    state = meet
+    while backward[state] is not None:
+        action, parent = backward[state]
+        path.append((action, parent))
+        state = parent
+
+    return path
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once.
+
+    If no possible path, returns None.
+    """
+    search_stats = stats.SearchStats("bidirectional")
+    neighbors = search_neighbors()
+    source = state_for_person(source)
+    target = state_for_person(target)
+    if source == target:
+        search_stats.finish()
+        return []
+
+    # Parents map each reached person to the (movie_id, person_id) step
+    # that reached it, with None for the root of each search
+    forward = {source: None}
+    backward = {target: None}
+    forward_depths = {source: 0}
+    backward_depths = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Always grow the smaller frontier by one full layer
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meet = expand_layer(
+                forward_frontier, forward, forward_depths, backward_depths,
+                search_stats, neighbors
+            )
+        else:
+            backward_frontier, meet = expand_layer(
+                backward_frontier, backward, backward_depths, forward_depths,
+                search_stats, neighbors
+            )
+
+        search_stats.observe_frontier(
+            len(forward_frontier) + len(backward_frontier)
+        )
+        if meet is not None:
+            search_stats.finish()
+            return path_ids(join_paths(meet, forward, backward))
+
+    # One side ran out of people to expand, so no path exists
+    search_stats.finish()
+    return None
+
+
+class SourceSearch():
+    """
+    Breadth-first search from one source that can be resumed, so each
+    query only expands people until its target is reached, and later
+    queries from the same source pick up where it stopped.
+    """
+    def __init__(self, source):
+        self.neighbors = search_neighbors()
+        self.source = state_for_person(source)
+
+        # Maps each reached state to the (action, state) step that
+        # first reached it, with None for the source
+        self.parents = {self.source: None}
+        self.frontier = deque([self.source])
+
+    def shortest_path(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, or None if not connected.
+        """
+        target = state_for_person(target)
+        parents = self.parents
+        frontier = self.frontier
+        search_stats = stats.SearchStats("resumable_bfs")
+
+        # Everyone reached so far was reached by a shortest path
+        while target not in parents and frontier:
+            person = frontier.popleft()
+            search_stats.expand(len(frontier))
+            search_stats.neighbor_calls += 1
+            for action, state in self.neighbors(person):
+                if state not in parents:
+                    parents[state] = (action, person)
+                    frontier.append(state)
+        search_stats.finish()
+
+        if target not in parents:
+            return None
+        path = []
+        state = target
+        while parents[state] is not None:
+            action, parent = parents[state]
+            path.append((action, state))
+            state = parent
+        path.reverse()
+        return path_ids(path)
+
+
+class SearchCache():
+    """
+    Keeps the searches of the most recently queried sources.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.searches = OrderedDict()
+
+    def get(self, source):
+        """
+        Returns the search from the source, and whether it was already
+        cached.
+        """
+        if source in self.searches:
+            self.searches.move_to_end(source)
+            return self.searches[source], True
+
+        search = SourceSearch(source)
+        if self.size > 0:
+            self.searches[source] = search
+            if len(self.searches) > self.size:
+                self.searches.popitem(last=False)
+        return search, False
+
+
+def resolve_person(name):
+    """
+    Returns the IMDB id for a person's name or id without prompting,
+    raising ValueError if there is no such person or the name is
+    ambiguous.
+    """
+    if name in people:
+        return name
+    person_ids = sorted(names.get(name.lower(), set()))
+    if len(person_ids) == 0:
+        suggestions = []
+        if name_index is not None:
+            suggestions = [f"{candidate.name} ({candidate.person_id})"
+                           for candidate in name_index.lookup(name, 5)]
+        if suggestions:
+            raise ValueError(f"person not found: {name}, "
+                             f"did you mean: {', '.join(suggestions)}")
+        raise ValueError(f"person not found: {name}")
+    elif len(person_ids) > 1:
+        raise ValueError(
+            f"ambiguous name {name}, use one of: {', '.join(person_ids)}"
+        )
+    return person_ids[0]
+
+
+def answer_query(source_name, target_name, cache):
+    """
+    Returns a JSON-ready result for one batch query.
+    """
+    start = time.perf_counter()
+    result = {"source": source_name, "target": target_name}
+    try:
+        source = resolve_person(source_name)
+        target = resolve_person(target_name)
+    except ValueError as error:
+        result["error"] = str(error)
+    else:
+        search, cached = cache.get(source)
+        path = search.shortest_path(target)
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+        result["cached"] = cached
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def run_batch(lines, output, cache_size=SEARCH_CACHE_SIZE):
+    """
+    Answers every 'source,target' pair of names in lines, writing one
+    JSON result per query to output.
+    """
+    cache = SearchCache(cache_size)
+    for row in csv.reader(lines):
+        if not row or not "".join(row).strip():
+            continue
+        if len(row) != 2:
+            result = {"error": f"expected source,target: {','.join(row)}"}
+        else:
+            source_name, target_name = (name.strip() for name in row)
+            result = answer_query(source_name, target_name, cache)
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
     person_ids = list(names.get(name.lower(), set()))
-    if len(person_ids) == 0:
+    if len(person_ids) == 0 and name_index is not None:
+        candidates = name_index.lookup(name)
+        if len(candidates) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        for candidate in candidates:
+            print(f"ID: {candidate.person_id}, Name: {candidate.name}, "
+                  f"Birth: {candidate.birth}")
+        try:
+            person_id = input("Intended Person ID: ")
+            if person_id in {candidate.person_id for candidate in candidates}:
+                return person_id
+        except ValueError:
+            pass
+        return None
+    elif len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -187,6 +630,9 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,492 @@
+import csv
+import itertools
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections.abc import Mapping
+from operator import itemgetter
+
+# Rows parsed between progress reports while streaming CSV files
+CHUNK_SIZE = 100000
+
+# Bump whenever the snapshot layout changes so old files are rebuilt
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b"DEGREES\0"
+SNAPSHOT_NAME = "degrees.snapshot"
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Magic, version, fingerprint length, then offset and length of each section
+HEADER = struct.Struct("<8sII")
+SECTION = struct.Struct("<QQ")
+ARRAY_SECTIONS = ("person_offsets", "person_movies",
+                  "movie_offsets", "movie_people")
+STRING_SECTIONS = ("person_ids", "person_names", "person_births",
+                   "movie_ids", "movie_titles", "movie_years")
+
+
+def build_csr(rows, sources, targets):
+    """
+    Returns (offsets, values) arrays in compressed sparse row form,
+    where values[offsets[r]:offsets[r + 1]] are the targets of row r.
+    """
+    offsets = array("I", bytes(4 * (rows + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+
+    values = array("I", bytes(4 * len(sources)))
+    position = offsets[:-1]
+    for source, target in zip(sources, targets):
+        values[position[source]] = target
+        position[source] += 1
+    return offsets, values
+
+
+def dedupe_rows(offsets, values):
+    """
+    Returns CSR arrays with the targets of each row sorted and
+    duplicates removed.
+    """
+    unique_offsets = array("I", [0])
+    unique_values = array("I")
+    for row in range(len(offsets) - 1):
+        unique_values.extend(sorted(set(values[offsets[row]:offsets[row + 1]])))
+        unique_offsets.append(len(unique_values))
+    return unique_offsets, unique_values
+
+
+def row_sources(offsets):
+    """
+    Returns an array repeating each row index once per target.
+    """
+    sources = array("I")
+    for row in range(len(offsets) - 1):
+        sources.extend(array("I", [row]) * (offsets[row + 1] - offsets[row]))
+    return sources
+
+
+def read_rows(path, columns, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields tuples of the named columns of each row of a CSV file,
+    parsing it in chunks and calling progress(name, rows, seconds)
+    after each chunk.
+    """
+    name = os.path.basename(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        select = itemgetter(*(header.index(column) for column in columns))
+        start = time.perf_counter()
+        rows = 0
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                break
+            for row in chunk:
+                yield select(row)
+            rows += len(chunk)
+            if progress is not None:
+                progress(name, rows, time.perf_counter() - start)
+
+
+def released_since(year, min_year):
+    """
+    Returns True if a movie year is known and no earlier than min_year.
+    """
+    return year.isdigit() and int(year) >= min_year
+
+
+class CompactGraph():
+    """
+    Person-movie graph with IMDB ids interned to dense integers and
+    the edges stored in CSR arrays in both directions.
+    """
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(movie_ids)
+        }
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+
+    @classmethod
+    def from_columns(cls, people, movies, edge_people, edge_movies):
+        """
+        Builds a graph from (ids, names, births) and (ids, titles, years)
+        columns plus parallel arrays of the person and movie index of
+        each edge, which may repeat.
+        """
+        person_ids, person_names, person_births = people
+        movie_ids, movie_titles, movie_years = movies
+        person_offsets, person_movies = dedupe_rows(*build_csr(
+            len(person_ids), edge_people, edge_movies
+        ))
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), person_movies, row_sources(person_offsets)
+        )
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    @classmethod
+    def from_csv(cls, directory, min_year=None, progress=None):
+        """
+        Builds a graph by streaming the people, movies and stars CSV
+        files, reading only the columns it keeps.
+
+        If min_year is given, only movies released since then and the
+        people who starred in them are loaded. progress is called with
+        (file name, rows, seconds) as each file is read.
+        """
+        def path(name):
+            return os.path.join(directory, name)
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_index = {}
+        for movie_id, title, year in read_rows(
+            path("movies.csv"), ("id", "title", "year"), progress
+        ):
+            if min_year is None or released_since(year, min_year):
+                intern_row(movie_index, movie_id,
+                           (movie_ids, movie_titles, movie_years),
+                           (movie_id, title, year))
+
+        person_ids, person_names, person_births = [], [], []
+        person_index = {}
+        edge_people = array("I")
+        edge_movies = array("I")
+
+        def read_people():
+            for person_id, name, birth in read_rows(
+                path("people.csv"), ("id", "name", "birth"), progress
+            ):
+                if min_year is None or person_id in person_index:
+                    intern_row(person_index, person_id,
+                               (person_ids, person_names, person_births),
+                               (person_id, name, birth))
+
+        def read_stars():
+            for person_id, movie_id in read_rows(
+                path("stars.csv"), ("person_id", "movie_id"), progress
+            ):
+                movie = movie_index.get(movie_id)
+                if movie is None:
+                    continue
+                person = person_index.get(person_id)
+                if person is None:
+                    if min_year is None:
+                        continue
+
+                    # Reserve an index, filled in when people are read
+                    person = len(person_ids)
+                    person_index[person_id] = person
+                    person_ids.append(person_id)
+                    person_names.append(None)
+                    person_births.append(None)
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        # A subgraph only needs the people its movies' stars name
+        if min_year is None:
+            read_people()
+            read_stars()
+        else:
+            read_stars()
+            read_people()
+            edge_people, edge_movies = drop_missing_people(
+                (person_ids, person_names, person_births),
+                edge_people, edge_movies
+            )
+
+        return cls.from_columns(
+            (person_ids, person_names, person_births),
+            (movie_ids, movie_titles, movie_years),
+            edge_people, edge_movies
+        )
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds a graph from people and movies dicts in the format
+        produced by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        edge_people = array("I")
+        edge_movies = array("I")
+        for person_id, person in people.items():
+            for movie_id in person["movies"]:
+                if movie_id in movie_index:
+                    edge_people.append(person_index[person_id])
+                    edge_movies.append(movie_index[movie_id])
+
+        return cls.from_columns(
+            (person_ids,
+             [people[person_id]["name"] for person_id in person_ids],
+             [people[person_id]["birth"] for person_id in person_ids]),
+            (movie_ids,
+             [movies[movie_id]["title"] for movie_id in movie_ids],
+             [movies[movie_id]["year"] for movie_id in movie_ids]),
+            edge_people, edge_movies
+        )
+
+    def movies_for(self, person):
+        """Returns the movie indices of a person index."""
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def people_for(self, movie):
+        """Returns the person indices of a movie index."""
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with a given person index, including the person themselves.
+        """
+        for movie in self.movies_for(person):
+            for costar in self.people_for(movie):
+                yield movie, costar
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        return {
+            (movie_ids[movie], person_ids[costar])
+            for movie, costar in self.neighbors(self.person_index[person_id])
+        }
+
+    def nbytes(self):
+        """Returns the number of bytes held by the edge arrays."""
+        return sum(
+            len(values) * values.itemsize
+            for values in (self.person_offsets, self.person_movies,
+                           self.movie_offsets, self.movie_people)
+        )
+
+
+def fingerprint(directory, min_year=None):
+    """
+    Returns bytes identifying the current version of the CSV files and
+    the subgraph loaded from them.
+    """
+    files = {"min_year": min_year}
+    for name in CSV_FILES:
+        info = os.stat(os.path.join(directory, name))
+        files[name] = [info.st_mtime_ns, info.st_size]
+    return json.dumps(files, sort_keys=True).encode()
+
+
+def write_snapshot(graph, path, stamp):
+    """
+    Writes graph to a binary snapshot at path, tagged with stamp.
+    """
+    sections = [
+        getattr(graph, name).tobytes() for name in ARRAY_SECTIONS
+    ] + [
+        "\0".join(getattr(graph, name)).encode("utf-8")
+        for name in STRING_SECTIONS
+    ]
+    sizes = [len(getattr(graph, name)) for name in STRING_SECTIONS]
+
+    # Sections start on 8 byte boundaries so arrays can be cast in place
+    table_size = SECTION.size * len(sections) + 4 * len(sizes)
+    offset = align(HEADER.size + len(stamp) + table_size)
+    table = []
+    for section in sections:
+        table.append(SECTION.pack(offset, len(section)))
+        offset = align(offset + len(section))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(stamp)))
+        f.write(stamp)
+        f.write(b"".join(table))
+        f.write(struct.pack(f"<{len(sizes)}I", *sizes))
+        for section in sections:
+            f.write(bytes(align(f.tell()) - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, stamp):
+    """
+    Memory-maps the snapshot at path, returning its graph, or None if
+    the snapshot is missing, from another version or not tagged with
+    stamp.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, stamp_size = HEADER.unpack_from(buffer, 0)
+    except struct.error:
+        buffer.close()
+        return None
+    position = HEADER.size
+    if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION
+            or buffer[position:position + stamp_size] != stamp):
+        buffer.close()
+        return None
+    position += stamp_size
+
+    table = []
+    for _ in ARRAY_SECTIONS + STRING_SECTIONS:
+        table.append(SECTION.unpack_from(buffer, position))
+        position += SECTION.size
+    sizes = struct.unpack_from(f"<{len(STRING_SECTIONS)}I", buffer, position)
+
+    # Arrays stay in the mapped pages; only the strings are decoded
+    view = memoryview(buffer)
+    columns = {}
+    for name, (offset, length) in zip(ARRAY_SECTIONS, table):
+        columns[name] = view[offset:offset + length].cast("I")
+    for name, (offset, length), size in zip(
+        STRING_SECTIONS, table[len(ARRAY_SECTIONS):], sizes
+    ):
+        text = buffer[offset:offset + length].decode("utf-8")
+        columns[name] = text.split("\0") if size else []
+
+    return CompactGraph(**columns)
+
+
+def align(offset):
+    """Rounds offset up to a multiple of 8."""
+    return (offset + 7) & ~7
+
+
+def cached_graph(directory, min_year=None, progress=None):
+    """
+    Returns the graph for directory from its snapshot, rebuilding the
+    graph from the CSV files and rewriting the snapshot when the
+    snapshot is missing or stale.
+    """
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    stamp = fingerprint(directory, min_year)
+    graph = read_snapshot(path, stamp)
+    if graph is None:
+        graph = CompactGraph.from_csv(directory, min_year, progress)
+        try:
+            write_snapshot(graph, path, stamp)
+        except OSError:
+            # Read-only datasets still load, just without a warm start
+            pass
+    return graph
+
+
+def drop_missing_people(columns, edge_people, edge_movies):
+    """
+    Removes people whose row was never read from the person columns,
+    renumbering the rest, and returns the edge arrays without them.
+    """
+    person_ids, person_names, person_births = columns
+    kept = [person for person in range(len(person_ids))
+            if person_names[person] is not None]
+    if len(kept) == len(person_ids):
+        return edge_people, edge_movies
+
+    renumbered = array("i", [-1]) * len(person_ids)
+    for new, old in enumerate(kept):
+        renumbered[old] = new
+    for column in columns:
+        column[:] = [column[old] for old in kept]
+
+    kept_people = array("I")
+    kept_movies = array("I")
+    for person, movie in zip(edge_people, edge_movies):
+        if renumbered[person] != -1:
+            kept_people.append(renumbered[person])
+            kept_movies.append(movie)
+    return kept_people, kept_movies
+
+
+def intern_row(index, key, columns, values):
+    """
+    Stores values in the columns at the dense index of key, adding
+    a new index the first time the key is seen.
+    """
+    i = index.get(key)
+    if i is None:
+        index[key] = len(columns[0])
+        for column, value in zip(columns, values):
+            column.append(value)
+    else:
+        for column, value in zip(columns, values):
+            column[i] = value
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a compact graph in the format of degrees.people.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a compact graph in the format of degrees.movies.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person]
+                      for person in graph.people_for(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
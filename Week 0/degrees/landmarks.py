@@ -0,0 +1,310 @@
+import argparse
+import heapq
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph, cached_graph, fingerprint
+
+# Run on its own too, so find the shared stats module here as well
+SHARED_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "shared")
+if SHARED_DIRECTORY not in sys.path:
+    sys.path.insert(0, SHARED_DIRECTORY)
+import stats
+
+# Bump whenever the index layout changes so old files are rebuilt
+INDEX_VERSION = 2
+INDEX_MAGIC = b"LANDMARK"
+INDEX_NAME = "degrees.landmarks"
+
+# Magic, version, landmark count, person count, edge count, fingerprint
+# length; the fingerprint of the CSV files follows
+HEADER = struct.Struct("<8sIIIII")
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of the degrees of separation between the source
+    person index and every person, UNREACHABLE where not connected.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+
+    while frontier and depth < UNREACHABLE - 1:
+        depth += 1
+        next_layer = []
+        for person in frontier:
+            for movie in graph.movies_for(person):
+
+                # Each cast only needs to be scanned once per search
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for costar in graph.people_for(movie):
+                    if distances[costar] == UNREACHABLE:
+                        distances[costar] = depth
+                        next_layer.append(costar)
+        frontier = next_layer
+
+    return distances
+
+
+class LandmarkIndex():
+    """
+    Degrees of separation from a few landmark people to everyone,
+    giving bounds on the separation of any pair and an admissible
+    heuristic for A* search.
+    """
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=16):
+        """
+        Selects up to count landmarks and computes their distances.
+
+        The first landmark is the person in the most movies; each
+        following one is the person farthest from every landmark so
+        far, so that the landmarks surround the graph.
+        """
+        people = len(graph.person_ids)
+        if people == 0:
+            return cls(graph, array("I"), [])
+
+        offsets = graph.person_offsets
+        landmark = max(range(people),
+                       key=lambda person: offsets[person + 1] - offsets[person])
+        landmarks = array("I")
+        distances = []
+        closest = array("B", [UNREACHABLE]) * people
+
+        while len(landmarks) < count:
+            landmarks.append(landmark)
+            column = distances_from(graph, landmark)
+            distances.append(column)
+            for person in range(people):
+                if column[person] < closest[person]:
+                    closest[person] = column[person]
+
+            # Prefer the farthest reachable person; fall back to another
+            # component once everyone reachable is a landmark
+            candidates = [person for person in range(people)
+                          if 0 < closest[person] < UNREACHABLE]
+            if not candidates:
+                candidates = [person for person in range(people)
+                              if closest[person] == UNREACHABLE
+                              and offsets[person + 1] > offsets[person]]
+            if not candidates:
+                break
+            landmark = max(candidates, key=lambda person: (
+                closest[person], offsets[person + 1] - offsets[person]
+            ))
+
+        return cls(graph, landmarks, distances)
+
+    @classmethod
+    def load(cls, graph, path, stamp=b""):
+        """
+        Reads the index at path, returning None if it is missing, from
+        another version or built for a different graph or stamp.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            (magic, version, count, people, edges,
+             stamp_size) = HEADER.unpack_from(data, 0)
+        except struct.error:
+            return None
+        position = HEADER.size + stamp_size
+        if (magic != INDEX_MAGIC or version != INDEX_VERSION
+                or data[HEADER.size:position] != stamp
+                or people != len(graph.person_ids)
+                or edges != len(graph.person_movies)
+                or len(data) != position + 4 * count + count * people):
+            return None
+
+        landmarks = array("I", data[position:position + 4 * count])
+        position += 4 * count
+        distances = []
+        for _ in range(count):
+            distances.append(array("B", data[position:position + people]))
+            position += people
+        return cls(graph, landmarks, distances)
+
+    def save(self, path, stamp=b""):
+        """
+        Writes the index to path, tagged with stamp.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION,
+                                len(self.landmarks),
+                                len(self.graph.person_ids),
+                                len(self.graph.person_movies),
+                                len(stamp)))
+            f.write(stamp)
+            f.write(self.landmarks.tobytes())
+            for column in self.distances:
+                f.write(column.tobytes())
+        os.replace(temporary, path)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation of two
+        person indices. Upper is None if no landmark reaches both, and
+        both are None if the landmarks show they are not connected.
+        """
+        if source == target:
+            return 0, 0
+
+        lower = 0
+        upper = None
+        for column in self.distances:
+            source_distance = column[source]
+            target_distance = column[target]
+            if source_distance == UNREACHABLE and target_distance == UNREACHABLE:
+                continue
+            if UNREACHABLE in (source_distance, target_distance):
+                return None, None
+            lower = max(lower, abs(source_distance - target_distance))
+            if upper is None or source_distance + target_distance < upper:
+                upper = source_distance + target_distance
+
+        # Different people are always at least one degree apart
+        return max(lower, 1), upper
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, searching with A* guided by
+        the landmark distances.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        search_stats = stats.SearchStats("landmark_astar")
+
+        if source == target:
+            search_stats.finish()
+            return []
+        lower, _ = self.bounds(source, target)
+        if lower is None:
+            search_stats.finish()
+            return None
+
+        # Landmarks that reach the target give its distance column
+        targets = [(column, column[target]) for column in self.distances
+                   if column[target] != UNREACHABLE]
+
+        def heuristic(person):
+            """Returns a lower bound on the degrees from person to target."""
+            estimate = 0
+            for column, target_distance in targets:
+                distance = column[person]
+                if distance == UNREACHABLE:
+                    return None
+                estimate = max(estimate, abs(distance - target_distance))
+            return estimate
+
+        parents = {source: None}
+        costs = {source: 0}
+        frontier = [(heuristic(source), 0, source)]
+        closed = set()
+
+        while frontier:
+            _, cost, person = heapq.heappop(frontier)
+            if person == target:
+                search_stats.finish()
+                return self.path_to(parents, target)
+            if person in closed:
+                continue
+            closed.add(person)
+            search_stats.expand(len(frontier))
+
+            search_stats.neighbor_calls += 1
+            for movie, costar in graph.neighbors(person):
+                if costar in closed:
+                    continue
+                if costar in costs and costs[costar] <= cost + 1:
+                    continue
+                estimate = heuristic(costar)
+                if estimate is None:
+                    continue
+                costs[costar] = cost + 1
+                parents[costar] = (movie, person)
+                heapq.heappush(frontier, (cost + 1 + estimate, cost + 1, costar))
+
+        search_stats.finish()
+        return None
+
+    def path_to(self, parents, target):
+        """
+        Returns the (movie_id, person_id) path to target in a parents map
+        of person indices.
+        """
+        graph = self.graph
+        path = []
+        person = target
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((graph.movie_ids[movie], graph.person_ids[person]))
+            person = parent
+        path.reverse()
+        return path
+
+
+def load_or_build(graph, directory, count=16, min_year=None):
+    """
+    Returns the landmark index saved in directory for graph, building
+    and saving it first if it is missing or the CSV files changed since.
+    """
+    path = os.path.join(directory, INDEX_NAME)
+    stamp = fingerprint(directory, min_year)
+    index = LandmarkIndex.load(graph, path, stamp)
+    if index is None:
+        index = LandmarkIndex.build(graph, count)
+        try:
+            index.save(path, stamp)
+        except OSError:
+            pass
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--count", type=int, default=16,
+                        help="number of landmarks to select")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the graph from its snapshot")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        graph = cached_graph(args.directory)
+    else:
+        graph = CompactGraph.from_csv(args.directory)
+    index = LandmarkIndex.build(graph, args.count)
+    index.save(os.path.join(args.directory, INDEX_NAME),
+               fingerprint(args.directory))
+    for landmark in index.landmarks:
+        print(f"{graph.person_ids[landmark]}: {graph.person_names[landmark]}",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+# A ranked match for a name lookup
+Candidate = namedtuple("Candidate", ["person_id", "name", "birth", "score"])
+
+# Candidates gathered from the rarest trigrams before scoring
+CANDIDATE_BUDGET = 2000
+
+# Candidates with the most shared trigrams that are scored exactly
+SCORED_CANDIDATES = 50
+
+# Completions gathered before ranking by length
+COMPLETION_BUDGET = 200
+
+# Approximate matches less similar than this are not returned
+MIN_SIMILARITY = 0.3
+
+
+def normalize(name):
+    """
+    Returns name lowercased, without accents and with single spaces.
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def trigrams(key):
+    """
+    Returns the set of trigrams of a normalized name, padded so that
+    word starts and ends count.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Sorted and trigram indexes over people's names, for autocomplete
+    and approximate lookup.
+    """
+    def __init__(self, entries):
+        """
+        Builds the index from (person_id, name, birth) entries.
+        """
+        self.person_ids = []
+        self.names = []
+        self.births = []
+        self.keys = []
+        postings = {}
+
+        for person_id, name, birth in entries:
+            i = len(self.person_ids)
+            key = normalize(name)
+            self.person_ids.append(person_id)
+            self.names.append(name)
+            self.births.append(birth)
+            self.keys.append(key)
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, array("I")).append(i)
+
+        self.postings = postings
+
+        # Every suffix starting a word is sorted, so "hanks" completes
+        # "Tom Hanks" as well as "tom h" does
+        prefixes = []
+        for i, key in enumerate(self.keys):
+            start = 0
+            while start != -1:
+                prefixes.append((key[start:], i))
+                start = key.find(" ", start)
+                if start != -1:
+                    start += 1
+        prefixes.sort()
+        self.prefixes = [prefix for prefix, _ in prefixes]
+        self.prefix_people = array("I", (i for _, i in prefixes))
+
+    def candidate(self, i, score):
+        """Returns the Candidate for entry i."""
+        return Candidate(self.person_ids[i], self.names[i],
+                         self.births[i], score)
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit people with a word of their name starting
+        with prefix, shortest names first.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        # Very short prefixes only rank the first matches in order
+        matches = set()
+        position = bisect_left(self.prefixes, prefix)
+        while (position < len(self.prefixes)
+               and len(matches) < COMPLETION_BUDGET
+               and self.prefixes[position].startswith(prefix)):
+            matches.add(self.prefix_people[position])
+            position += 1
+
+        best = heapq.nsmallest(
+            limit, matches, key=lambda i: (len(self.keys[i]), self.keys[i])
+        )
+        return [self.candidate(i, len(prefix) / len(self.keys[i]))
+                for i in best]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to limit people whose names are most similar to name,
+        ranked by trigram similarity.
+        """
+        key = normalize(name)
+        if not key:
+            return []
+        query = trigrams(key)
+
+        # Gather candidates from the rarest trigrams first, and only the
+        # start of each posting list, so common trigrams like " jo" are
+        # never scanned in full
+        counts = {}
+        rarest = sorted(query, key=lambda t: len(self.postings.get(t, ())))
+        for trigram in rarest:
+            room = CANDIDATE_BUDGET - len(counts)
+            if room <= 0:
+                break
+            for i in self.postings.get(trigram, array("I"))[:room]:
+                counts[i] = counts.get(i, 0) + 1
+
+        scored = []
+        for i in heapq.nlargest(SCORED_CANDIDATES, counts, key=counts.get):
+            other = trigrams(self.keys[i])
+            score = 2 * len(query & other) / (len(query) + len(other))
+            if score >= MIN_SIMILARITY:
+                scored.append((score, i))
+
+        best = heapq.nlargest(limit, scored)
+        return [self.candidate(i, round(score, 3)) for score, i in best]
+
+    def lookup(self, name, limit=10):
+        """
+        Returns autocomplete matches for name followed by approximate
+        matches, without duplicates.
+        """
+        results = self.complete(name, limit)
+        if len(results) >= limit:
+            return results
+        seen = {candidate.person_id for candidate in results}
+        for candidate in self.search(name, limit):
+            if len(results) >= limit:
+                break
+            if candidate.person_id not in seen:
+                results.append(candidate)
+                seen.add(candidate.person_id)
+        return results
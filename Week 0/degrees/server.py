@@ -0,0 +1,218 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+# Number of recent latencies kept for percentiles
+LATENCY_WINDOW = 10000
+
+# Searches from recent sources, kept by each worker process
+cache = None
+
+
+def load_worker(directory, compact, snapshot):
+    """
+    Loads the graph in a worker process, unless it was already
+    inherited from the server by fork.
+    """
+    global cache
+    if len(degrees.people) == 0:
+        degrees.load_data(directory, compact=compact, snapshot=snapshot)
+    cache = degrees.SearchCache(degrees.SEARCH_CACHE_SIZE)
+
+
+def solve(source_name, target_name):
+    """
+    Answers one query in a worker process, returning a JSON-ready
+    result.
+    """
+    return degrees.answer_query(source_name, target_name, cache)
+
+
+class LatencyStats():
+    """
+    Thread-safe record of query counts and recent latencies.
+    """
+    def __init__(self, window=LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.queries = 0
+        self.errors = 0
+
+    def record(self, result, seconds):
+        """Records one answered query."""
+        with self.lock:
+            self.queries += 1
+            if "error" in result:
+                self.errors += 1
+            self.latencies.append(seconds)
+
+    def summary(self):
+        """Returns counts and latency percentiles in milliseconds."""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = {"queries": self.queries, "errors": self.errors}
+        if latencies:
+            summary["mean_ms"] = round(
+                1000 * sum(latencies) / len(latencies), 3
+            )
+            for percentile in (50, 90, 99):
+                index = min(len(latencies) - 1,
+                            len(latencies) * percentile // 100)
+                summary[f"p{percentile}_ms"] = round(
+                    1000 * latencies[index], 3
+                )
+            summary["max_ms"] = round(1000 * latencies[-1], 3)
+        return summary
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /path?source=...&target=..., POST /path with one
+    'source,target' pair per line, and GET /stats.
+    """
+    pool = None
+    processes = None
+    stats = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_json(200, self.stats.summary())
+        elif url.path == "/path":
+            query = parse_qs(url.query)
+            if "source" not in query or "target" not in query:
+                self.send_json(400, {"error": "source and target required"})
+                return
+            pair = (query["source"][0], query["target"][0])
+            self.send_json(200, self.answer([pair])[0])
+        else:
+            self.send_json(404, {"error": f"no such endpoint: {url.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/path":
+            self.send_json(404, {"error": f"no such endpoint: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        pairs = []
+        for row in csv.reader(body.splitlines()):
+            if len(row) == 2:
+                pairs.append(tuple(name.strip() for name in row))
+            elif row and "".join(row).strip():
+                self.send_json(400, {
+                    "error": f"expected source,target: {','.join(row)}"
+                })
+                return
+        self.send_json(200, self.answer(pairs))
+
+    def answer(self, pairs):
+        """
+        Distributes queries across the pool, recording the latency of
+        each from when it was submitted until its result came back.
+
+        Only one query per worker is submitted at a time, so queries
+        late in a long batch are not timed while waiting behind the
+        rest of the batch.
+        """
+        finished = queue.Queue()
+        submitted = {}
+        results = [None] * len(pairs)
+
+        def submit(index):
+            submitted[index] = time.perf_counter()
+            self.pool.apply_async(
+                solve, pairs[index],
+                callback=lambda result: finished.put(
+                    (index, result, time.perf_counter())
+                ),
+                error_callback=lambda error: finished.put(
+                    (index, {"source": pairs[index][0],
+                             "target": pairs[index][1],
+                             "error": str(error)}, time.perf_counter())
+                )
+            )
+
+        for index in range(min(self.processes, len(pairs))):
+            submit(index)
+        for _ in pairs:
+            index, result, end = finished.get()
+            latency = end - submitted[index]
+            result["latency_seconds"] = round(latency, 6)
+            self.stats.record(result, latency)
+            results[index] = result
+            if len(submitted) < len(pairs):
+                submit(len(submitted))
+        return results
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Latency stats replace per-request logging
+        pass
+
+
+def serve(args):
+    """
+    Loads the graph once, starts the worker pool and serves queries
+    until interrupted.
+    """
+    # Forked workers share the loaded graph instead of reloading it
+    if "fork" in multiprocessing.get_all_start_methods():
+        multiprocessing.set_start_method("fork", force=True)
+        print("Loading data...", file=sys.stderr)
+        degrees.load_data(args.directory, compact=args.compact,
+                          snapshot=args.snapshot)
+        print("Data loaded.", file=sys.stderr)
+
+    processes = args.processes or multiprocessing.cpu_count()
+    with multiprocessing.Pool(
+        processes,
+        initializer=load_worker,
+        initargs=(args.directory, args.compact, args.snapshot)
+    ) as pool:
+        QueryHandler.pool = pool
+        QueryHandler.processes = processes
+        QueryHandler.stats = LatencyStats()
+        server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+        host, port = server.server_address[:2]
+        print(f"Serving on http://{host}:{port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--processes", type=int,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in integer-indexed arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="memory-map the compact graph from a snapshot")
+    serve(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Search statistics reported through a common hook
+"""
+
+import json
+import sys
+import time
+
+# Functions called with the SearchStats of every finished search
+hooks = []
+
+
+class SearchStats():
+    """
+    Counts the work done by one search.
+    """
+    def __init__(self, search):
+        self.search = search
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_calls = 0
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def expand(self, frontier_size):
+        """Records expanding a node while frontier_size nodes wait."""
+        self.nodes_expanded += 1
+        self.observe_frontier(frontier_size)
+
+    def observe_frontier(self, frontier_size):
+        """Records the size of the frontier."""
+        if frontier_size > self.frontier_peak:
+            self.frontier_peak = frontier_size
+
+    def finish(self):
+        """Stops the clock and reports the stats to every hook."""
+        self.seconds = time.perf_counter() - self.start
+        for hook in hooks:
+            hook(self)
+
+    def as_dict(self):
+        """Returns the stats as a JSON-ready dict."""
+        return {
+            "search": self.search,
+            "nodes_expanded": self.nodes_expanded,
+            "frontier_peak": self.frontier_peak,
+            "neighbor_calls": self.neighbor_calls,
+            "seconds": None if self.seconds is None else round(self.seconds, 6)
+        }
+
+
+def add_hook(hook):
+    """Calls hook with the stats of every search that finishes."""
+    hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Stops calling hook."""
+    hooks.remove(hook)
+
+
+def print_stats(stats, file=None):
+    """Hook printing stats as one JSON line, to stderr by default."""
+    print(json.dumps(stats.as_dict()), file=file or sys.stderr)
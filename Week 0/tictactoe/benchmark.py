@@ -0,0 +1,288 @@
+import argparse
+import multiprocessing
+import sys
+import time
+
+import bitboard
+import mnk
+import parallel
+import tictactoe as ttt
+import stats
+
+
+def key(board):
+    """Returns a hashable copy of the board."""
+    return tuple(tuple(row) for row in board)
+
+
+def solve(board, values):
+    """
+    Returns the minimax value of the board, storing the value of every
+    position reachable from it in values.
+    """
+    board_key = key(board)
+    if board_key not in values:
+        if ttt.terminal(board):
+            values[board_key] = ttt.utility(board)
+        else:
+            children = [solve(ttt.result(board, action), values)
+                        for action in ttt.actions(board)]
+            if ttt.player(board) == ttt.X:
+                values[board_key] = max(children)
+            else:
+                values[board_key] = min(children)
+    return values[board_key]
+
+
+def positions():
+    """
+    Returns every reachable position with its minimax value.
+    """
+    values = {}
+    solve(ttt.initial_state(), values)
+    return values
+
+
+def check_engine(engine, values, search=ttt.minimax):
+    """
+    Checks that the engine picks a move keeping the minimax value in
+    every reachable, unfinished position. Returns the number of
+    positions checked.
+    """
+    checked = 0
+    for board_key, value in values.items():
+        board = [list(row) for row in board_key]
+        if ttt.terminal(board):
+            continue
+        move = search(board, engine)
+        if values[key(ttt.result(board, move))] != value:
+            sys.exit(f"{engine} plays {move} from {board_key}, "
+                     f"losing value {value}")
+        checked += 1
+    return checked
+
+
+def nodes_expanded(engine, board):
+    """
+    Returns the stats of the engine's search for a move on the board.
+    """
+    recorded = []
+    stats.add_hook(recorded.append)
+    try:
+        ttt.minimax(board, engine)
+    finally:
+        stats.remove_hook(recorded.append)
+    return recorded[-1]
+
+
+def bitboard_search(board, engine):
+    """Searches a list-of-lists board on its bitboard."""
+    return bitboard.minimax(bitboard.from_board(board), engine)
+
+
+def timed(search, board, engine, repeat):
+    """
+    Returns the best time of repeated searches for a move.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        search(board, engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def backend_benchmark(args):
+    """
+    Compares the list-of-lists and bitboard backends.
+    """
+    values = positions()
+    for engine in ["minimax", "alphabeta"]:
+        checked = check_engine(engine, values, bitboard_search)
+        print(f"bitboard {engine}: optimal in all {checked} positions")
+
+    board = ttt.initial_state()
+    print()
+    print(f"{'engine':>10} {'lists':>10} {'bitboard':>10}")
+    for engine in ["minimax", "alphabeta"]:
+        repeat = 1 if engine == "minimax" else args.repeat
+        lists = timed(ttt.minimax, board, engine, repeat)
+        bits = timed(bitboard.minimax, bitboard.from_board(board),
+                     engine, repeat)
+        print(f"{engine:>10} {lists:>9.4f}s {bits:>9.4f}s "
+              f"({lists / bits:.0f}x)")
+
+
+def engine_benchmark(args):
+    """
+    Checks every engine's moves and compares the nodes they expand.
+    """
+    values = positions()
+    print(f"{len(values)} reachable positions")
+
+    # Searching every position exhaustively takes minutes, so the full
+    # tree walk is only compared on the opening positions below
+    for engine in args.engines:
+        if engine == "minimax":
+            continue
+        start = time.perf_counter()
+        checked = check_engine(engine, values)
+        elapsed = time.perf_counter() - start
+        print(f"{engine}: optimal in all {checked} positions "
+              f"({elapsed:.3f}s)")
+
+    # A full-game solve from an empty table touches each canonical
+    # position once
+    if "memoized" in args.engines:
+        ttt.transpositions.clear()
+        ttt.minimax(ttt.initial_state(), "memoized")
+        print(f"memoized: {len(ttt.transpositions)} canonical positions, "
+              f"hit rate {ttt.transpositions.hit_rate():.1%}")
+        ttt.transpositions.clear()
+
+    openings = [("empty", ttt.initial_state())]
+    for action in [(1, 1), (0, 0), (0, 1)]:
+        openings.append((f"X at {action}",
+                         ttt.result(ttt.initial_state(), action)))
+
+    print()
+    print(f"{'position':>12} " + " ".join(f"{engine:>12}"
+                                         for engine in args.engines))
+    for name, board in openings:
+        ttt.transpositions.clear()
+        counts = [nodes_expanded(engine, board).nodes_expanded
+                  for engine in args.engines]
+        print(f"{name:>12} " + " ".join(f"{count:>12}" for count in counts))
+
+
+def mnk_search(board, engine):
+    """Searches a 3x3 board with the m,n,k engine to full depth."""
+    return mnk.Game(3, 3, 3).minimax(board, time_limit=60)
+
+
+def mnk_benchmark(args):
+    """
+    Checks the m,n,k engine on 3x3 and measures its latency and search
+    depth on larger boards under a time budget.
+    """
+    start = time.perf_counter()
+    checked = check_engine("mnk", positions(), mnk_search)
+    elapsed = time.perf_counter() - start
+    print(f"mnk 3x3x3: optimal in all {checked} positions ({elapsed:.3f}s)")
+
+    print()
+    print(f"{'board':>10} {'move':>10} {'depth':>6} {'seconds':>8}")
+    for m, n, k in [(4, 4, 3), (4, 4, 4), (5, 5, 4), (7, 7, 5), (15, 15, 5)]:
+        game = mnk.Game(m, n, k)
+        board = game.initial_state()
+        for _ in range(args.moves):
+            if game.terminal(board):
+                break
+            start = time.perf_counter()
+            move = game.minimax(board, time_limit=args.budget)
+            elapsed = time.perf_counter() - start
+            print(f"{f'{m}x{n}x{k}':>10} {str(move):>10} "
+                  f"{game.depth_reached:>6} {elapsed:>8.3f}")
+            board = game.result(board, move)
+
+
+def parallel_benchmark(args):
+    """
+    Checks that root-split search picks the same moves as alpha-beta on
+    3x3 and measures its speedup over a sequential search on larger
+    boards with each number of processes.
+    """
+    values = positions()
+    checked = 0
+    start = time.perf_counter()
+    for board_key in values:
+        board = [list(row) for row in board_key]
+        if ttt.terminal(board):
+            continue
+        move = parallel.minimax(board, max(args.processes))
+        if move != ttt.alphabeta(board):
+            sys.exit(f"parallel plays {move} from {board_key}, "
+                     f"alphabeta plays {ttt.alphabeta(board)}")
+        checked += 1
+    elapsed = time.perf_counter() - start
+    print(f"parallel 3x3: same moves as alphabeta in all {checked} "
+          f"positions ({elapsed:.3f}s)")
+
+    print()
+    print(f"{'board':>10} {'depth':>6} {'processes':>10} {'seconds':>8} "
+          f"{'speedup':>8}")
+    for m, n, k, depth in [(5, 5, 4, 5), (7, 7, 5, 4), (9, 9, 5, 4)]:
+        game = mnk.Game(m, n, k)
+        board = game.initial_state()
+        for action in [(m // 2, n // 2), (m // 2, n // 2 + 1)]:
+            board = game.result(board, action)
+
+        # One sequential search over the same moves in the same order
+        cells = [cell for row in board for cell in row]
+        mover = game.player(board)
+        opponent = ttt.O if mover == ttt.X else ttt.X
+        start = time.perf_counter()
+        _, expected = game.search_root(
+            cells, mover, opponent, game.ordered_moves(cells), depth,
+            cells.count(ttt.EMPTY), None, stats.SearchStats("sequential")
+        )
+        sequential = time.perf_counter() - start
+        expected = divmod(expected, n)
+        print(f"{f'{m}x{n}x{k}':>10} {depth:>6} {'-':>10} "
+              f"{sequential:>8.3f} {1:>7.2f}x")
+
+        for processes in args.processes:
+            parallel.get_pool(processes)
+            start = time.perf_counter()
+            move = parallel.mnk_minimax(game, board, depth, processes)
+            elapsed = time.perf_counter() - start
+            if move != expected:
+                sys.exit(f"parallel plays {move} on {m}x{n}x{k}, "
+                         f"sequential plays {expected}")
+            print(f"{f'{m}x{n}x{k}':>10} {depth:>6} {processes:>10} "
+                  f"{elapsed:>8.3f} {sequential / elapsed:>7.2f}x")
+    parallel.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    engines = commands.add_parser("engines", help="compare search engines")
+    engines.add_argument("--engines", nargs="+",
+                         default=["minimax"] + list(ttt.ENGINES),
+                         help="engines to compare")
+
+    backends = commands.add_parser("backends",
+                                   help="compare board representations")
+    backends.add_argument("--repeat", type=int, default=20,
+                          help="timing runs of the faster searches")
+
+    generalized = commands.add_parser("mnk", help="check and time the "
+                                      "m,n,k engine")
+    generalized.add_argument("--budget", type=float, default=0.5,
+                             help="seconds per move on larger boards")
+    generalized.add_argument("--moves", type=int, default=3,
+                             help="moves played on each larger board")
+
+    cores = multiprocessing.cpu_count()
+    split = commands.add_parser("parallel", help="compare root-split "
+                                "search with sequential search")
+    split.add_argument("--processes", type=int, nargs="+",
+                       default=sorted({1, 2, 4, cores}),
+                       help="pool sizes to time")
+
+    args = parser.parse_args()
+    if args.command == "engines":
+        engine_benchmark(args)
+    elif args.command == "mnk":
+        mnk_benchmark(args)
+    elif args.command == "parallel":
+        parallel_benchmark(args)
+    else:
+        backend_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
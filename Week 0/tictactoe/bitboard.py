@@ -0,0 +1,216 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A board is a pair of 9-bit integers (x, o), with bit 3 * i + j set where
+that player has moved at (i, j).
+"""
+
+from tictactoe import X, O, EMPTY
+import stats
+
+FULL = 0b111111111
+
+# Bit masks of every row, column and diagonal
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# WINS[bits] is 1 if the bits contain a complete line
+WINS = bytes(
+    int(any(bits & mask == mask for mask in WIN_MASKS))
+    for bits in range(FULL + 1)
+)
+
+# Cell bits, center first, then corners, then edges
+MOVE_ORDER = [1 << cell for cell in (4, 0, 2, 6, 8, 1, 3, 5, 7)]
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(board):
+    """
+    Returns the list-of-lists board of a bitboard.
+    """
+    x, o = board
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return X if bin(x).count("1") == bin(o).count("1") else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    taken = board[0] | board[1]
+    return {(cell // 3, cell % 3) for cell in range(9)
+            if not taken >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = board
+    i, j = action
+    bit = 1 << (3 * i + j)
+    if (x | o) & bit:
+        raise Exception("cell already taken")
+    if player(board) == X:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = board
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = board
+    return bool(WINS[x] or WINS[o]) or x | o == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = board
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def action_for(bit):
+    """Returns the (i, j) action of a cell bit."""
+    cell = bit.bit_length() - 1
+    return (cell // 3, cell % 3)
+
+
+def value(mover, waiting, search_stats, depth):
+    """
+    Returns the value of a position for the player about to move,
+    searching every line of play: 1 for a win, 0 for a draw and -1 for
+    a loss.
+    """
+    if WINS[waiting]:
+        return -1
+    free = FULL & ~(mover | waiting)
+    if not free:
+        return 0
+
+    search_stats.expand(depth)
+    search_stats.neighbor_calls += 1
+    best = -1
+    while free:
+        bit = free & -free
+        free ^= bit
+        v = -value(waiting, mover | bit, search_stats, depth + 1)
+        if v > best:
+            best = v
+    return best
+
+
+def pruned_value(mover, waiting, alpha, beta, search_stats, depth):
+    """
+    Returns the value of a position for the player about to move, as
+    value() does, pruning lines outside (alpha, beta).
+    """
+    if WINS[waiting]:
+        return -1
+    taken = mover | waiting
+    if taken == FULL:
+        return 0
+
+    search_stats.expand(depth)
+    search_stats.neighbor_calls += 1
+
+    # A move completing a line wins outright
+    for bit in MOVE_ORDER:
+        if not taken & bit and WINS[mover | bit]:
+            return 1
+
+    best = -1
+    for bit in MOVE_ORDER:
+        if taken & bit:
+            continue
+        v = -pruned_value(waiting, mover | bit, -beta, -alpha,
+                          search_stats, depth + 1)
+        if v > best:
+            best = v
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+    return best
+
+
+def minimax(board, engine="minimax"):
+    """
+    Returns the optimal action for the current player on the board.
+
+    engine is "minimax" to search every line of play, or "alphabeta"
+    to prune with ordered moves.
+    """
+    if terminal(board):
+        return None
+
+    x, o = board
+    mover, waiting = (x, o) if player(board) == X else (o, x)
+    search_stats = stats.SearchStats(f"bitboard_{engine}")
+
+    best_action, best = None, -2
+    for bit in MOVE_ORDER:
+        if (mover | waiting) & bit:
+            continue
+        if engine == "alphabeta":
+            v = -pruned_value(waiting, mover | bit, -1, -best,
+                              search_stats, 2)
+        else:
+            v = -value(waiting, mover | bit, search_stats, 2)
+        if v > best:
+            best_action, best = action_for(bit), v
+            if best == 1 and engine == "alphabeta":
+                break
+
+    search_stats.finish()
+    return best_action
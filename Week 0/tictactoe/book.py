@@ -0,0 +1,66 @@
+"""
+Writes the tic-tac-toe opening book
+
+Every position reachable from the empty board is solved once and its
+optimal move stored as one byte at the position's index, so minimax
+can answer from the table without searching.
+"""
+
+import os
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+
+def reachable(board, positions):
+    """
+    Adds every bitboard reachable from board to positions.
+    """
+    if board in positions:
+        return
+    positions.add(board)
+    if not bitboard.terminal(board):
+        for action in bitboard.actions(board):
+            reachable(bitboard.result(board, action), positions)
+
+
+def generate():
+    """
+    Returns the opening book table.
+    """
+    positions = set()
+    reachable(bitboard.initial_state(), positions)
+
+    table = bytearray([ttt.NO_MOVE]) * ttt.BOOK_SIZE
+    for board in positions:
+        move = bitboard.minimax(board, "alphabeta")
+        if move is not None:
+            i, j = move
+            table[ttt.encode(bitboard.to_board(board))] = 3 * i + j
+    return bytes(table)
+
+
+def write_book(table, path=ttt.BOOK_PATH):
+    """
+    Writes the table to path.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        f.write(table)
+    os.replace(temporary, path)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+    table = generate()
+    write_book(table, path)
+    moves = sum(cell != ttt.NO_MOVE for cell in table)
+    print(f"Wrote {moves} moves to {path}")
+
+
+if __name__ == "__main__":
+    main()
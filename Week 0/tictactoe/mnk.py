@@ -0,0 +1,298 @@
+"""
+m,n,k Game Player
+
+Tic-tac-toe on an m by n board where k in a row wins, searched with
+iterative-deepening alpha-beta under a time budget.
+"""
+
+import time
+
+from tictactoe import X, O, EMPTY
+import stats
+
+# Value of a won position, less the plies taken to win it
+WIN = 1000000
+
+# Positions visited between checks of the clock
+CLOCK_INTERVAL = 64
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Game():
+    """
+    An m by n board where k in a row wins.
+    """
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError(f"{k} in a row does not fit on {m}x{n}")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.depth_reached = 0
+        self.visits = 0
+
+        # Cells of every run of k in a row, and the runs through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(tuple(
+                            (i + di * s) * n + (j + dj * s) for s in range(k)
+                        ))
+        self.cell_lines = [[] for _ in range(m * n)]
+        for line in self.lines:
+            for cell in line:
+                self.cell_lines[cell].append(line)
+
+        # Cells within two steps of each cell, where play is likely
+        self.nearby = []
+        for cell in range(m * n):
+            i, j = divmod(cell, n)
+            self.nearby.append([
+                a * n + b
+                for a in range(max(0, i - 2), min(m, i + 3))
+                for b in range(max(0, j - 2), min(n, j + 3))
+                if (a, b) != (i, j)
+            ])
+
+        # Central cells first when nothing else tells moves apart
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.centrality = [
+            -abs(cell // n - center_i) - abs(cell % n - center_j)
+            for cell in range(m * n)
+        ]
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        xs = sum(row.count(X) for row in board)
+        os = sum(row.count(O) for row in board)
+        return X if xs == os else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise Exception("cell already taken")
+        board_copy = [row[:] for row in board]
+        board_copy[i][j] = self.player(board)
+        return board_copy
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for line in self.lines:
+            first = cells[line[0]]
+            if first != EMPTY and all(cells[cell] == first for cell in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell != EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        won = self.winner(board)
+        return 1 if won == X else -1 if won == O else 0
+
+    def evaluate(self, board):
+        """
+        Returns the heuristic value of the board for X, positive when
+        X has more and longer open runs than O.
+        """
+        cells = [cell for row in board for cell in row]
+        return self.score(cells, X)
+
+    def score(self, cells, mark):
+        """
+        Returns the heuristic value of the cells for mark: every run of
+        k still open to one player counts 4 ** (marks in it) for them.
+        """
+        total = 0
+        for line in self.lines:
+            mine = theirs = 0
+            for cell in line:
+                if cells[cell] == mark:
+                    mine += 1
+                elif cells[cell] != EMPTY:
+                    theirs += 1
+            if theirs == 0 and mine > 0:
+                total += 4 ** mine
+            elif mine == 0 and theirs > 0:
+                total -= 4 ** theirs
+        return total
+
+    def completes_line(self, cells, cell, mark):
+        """
+        Returns True if mark at cell is part of a full run of k.
+        """
+        return any(all(cells[other] == mark for other in line)
+                   for line in self.cell_lines[cell])
+
+    def ordered_moves(self, cells):
+        """
+        Returns empty cells worth searching, most promising first.
+
+        Once there are marks on the board, only cells within two steps
+        of a mark are considered, nearest and most central first.
+        """
+        marked = [cell for cell, mark in enumerate(cells) if mark != EMPTY]
+        if not marked:
+            return sorted(range(len(cells)),
+                          key=lambda cell: -self.centrality[cell])
+
+        heat = {}
+        for cell in marked:
+            for other in self.nearby[cell]:
+                if cells[other] == EMPTY:
+                    heat[other] = heat.get(other, 0) + 1
+        if not heat:
+            heat = {cell: 0 for cell, mark in enumerate(cells)
+                    if mark == EMPTY}
+        return sorted(heat, key=lambda cell: (-heat[cell],
+                                              -self.centrality[cell]))
+
+    def minimax(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the best action for the current player found within
+        time_limit seconds, deepening the search one ply at a time.
+
+        The move from the deepest completed search is returned, and at
+        least a one ply search always completes.
+        """
+        if self.terminal(board):
+            return None
+
+        cells = [cell for row in board for cell in row]
+        mover = self.player(board)
+        opponent = O if mover == X else X
+        empties = cells.count(EMPTY)
+        limit = empties if max_depth is None else min(max_depth, empties)
+        deadline = time.perf_counter() + time_limit
+
+        search_stats = stats.SearchStats(f"mnk_{self.m}x{self.n}x{self.k}")
+        moves = self.ordered_moves(cells)
+        best_move = moves[0]
+        self.depth_reached = 0
+
+        for depth in range(1, limit + 1):
+            try:
+                value, move = self.search_root(
+                    cells, mover, opponent, moves, depth, empties,
+                    # The first ply is always allowed to finish
+                    None if depth == 1 else deadline, search_stats
+                )
+            except Timeout:
+                break
+            best_move = move
+            self.depth_reached = depth
+
+            # Search the principal move first at the next depth
+            moves.remove(move)
+            moves.insert(0, move)
+
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN - self.m * self.n - 1:
+                break
+
+        search_stats.finish()
+        return divmod(best_move, self.n)
+
+    def search_root(self, cells, mover, opponent, moves, depth, empties,
+                    deadline, search_stats):
+        """
+        Returns (value, move) of the best root move at a fixed depth.
+        """
+        alpha, beta = -WIN - 1, WIN + 1
+        best_value, best_move = -WIN - 1, moves[0]
+        for move in moves:
+            cells[move] = mover
+            try:
+                value = -self.negamax(cells, opponent, mover, depth - 1,
+                                      -beta, -alpha, move, empties - 1, 1,
+                                      deadline, search_stats)
+            finally:
+                cells[move] = EMPTY
+            if value > best_value:
+                best_value, best_move = value, move
+                alpha = max(alpha, value)
+        return best_value, best_move
+
+    def negamax(self, cells, mover, waiting, depth, alpha, beta, last,
+                empties, ply, deadline, search_stats):
+        """
+        Returns the value of the cells for mover, searching depth more
+        plies with alpha-beta pruning.
+        """
+        # Leaves are checked too, since scoring them is most of the work
+        self.visits += 1
+        if (deadline is not None and self.visits % CLOCK_INTERVAL == 0
+                and time.perf_counter() > deadline):
+            raise Timeout
+
+        if self.completes_line(cells, last, waiting):
+            return -(WIN - ply)
+        if empties == 0:
+            return 0
+        if depth == 0:
+            return self.score(cells, mover)
+
+        search_stats.expand(ply)
+        search_stats.neighbor_calls += 1
+
+        moves = self.ordered_moves(cells)
+
+        # A move completing a run wins outright
+        for move in moves:
+            cells[move] = mover
+            won = self.completes_line(cells, move, mover)
+            cells[move] = EMPTY
+            if won:
+                return WIN - ply - 1
+
+        best = -WIN - 1
+        for move in moves:
+            cells[move] = mover
+            try:
+                value = -self.negamax(cells, waiting, mover, depth - 1,
+                                      -beta, -alpha, move, empties - 1,
+                                      ply + 1, deadline, search_stats)
+            finally:
+                cells[move] = EMPTY
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                if alpha >= beta:
+                    break
+        return best
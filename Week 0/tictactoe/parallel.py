@@ -0,0 +1,147 @@
+"""
+Root-split search: each move from the root is searched in its own
+worker process, and the best value among them picks the move.
+
+Workers cannot share bounds while they run, so the first and most
+promising move is searched before the others are sent out, and its
+value is the bound every worker prunes against. The moves are tried in
+the same order as the sequential searches and ties go to the first, so
+both pick the same move.
+"""
+
+import multiprocessing
+
+import bitboard
+import mnk
+import tictactoe as ttt
+import stats
+
+# Worker pool shared by every search, created on first use
+pool = None
+pool_size = None
+
+# Games of each (m, n, k) built by a worker process
+games = {}
+
+
+def get_pool(processes=None):
+    """
+    Returns the worker pool, starting one with processes workers if
+    there is none of that size.
+    """
+    global pool, pool_size
+    processes = processes or multiprocessing.cpu_count()
+    if pool is None or pool_size != processes:
+        close()
+        pool = multiprocessing.Pool(processes)
+        pool_size = processes
+    return pool
+
+
+def close():
+    """Stops the worker pool, if there is one."""
+    global pool, pool_size
+    if pool is not None:
+        pool.close()
+        pool.join()
+    pool = pool_size = None
+
+
+def move_value(task):
+    """
+    Returns (value, nodes expanded) of one 3x3 move for the player
+    making it, searched with pruning on bitboards. Values at most alpha
+    are only bounds, since such a move cannot be the best.
+    """
+    board, action, alpha = task
+    mover, waiting = bitboard.from_board(board)
+    if ttt.player(board) == ttt.O:
+        mover, waiting = waiting, mover
+    bit = 1 << (3 * action[0] + action[1])
+
+    search_stats = stats.SearchStats("parallel_worker")
+    value = -bitboard.pruned_value(waiting, mover | bit, -1, -alpha,
+                                   search_stats, 2)
+    return value, search_stats.nodes_expanded
+
+
+def minimax(board, processes=None):
+    """
+    Returns the optimal action for the current player on a 3x3 board,
+    searching each move in a separate worker.
+    """
+    if ttt.terminal(board):
+        return None
+
+    search_stats = stats.SearchStats("parallel")
+    actions = ttt.ordered_actions(board)
+    best, nodes = move_value((board, actions[0], -2))
+    search_stats.nodes_expanded += nodes
+    best_action = actions[0]
+
+    # Nothing beats a win
+    if best < 1:
+        results = get_pool(processes).map(
+            move_value, [(board, action, best) for action in actions[1:]]
+        )
+        for action, (value, nodes) in zip(actions[1:], results):
+            search_stats.nodes_expanded += nodes
+            if value > best:
+                best_action, best = action, value
+    search_stats.finish()
+    return best_action
+
+
+def mnk_move_value(task):
+    """
+    Returns (value, nodes expanded) of one m,n,k move for the player
+    making it, searched depth plies deep. Values at most alpha are only
+    bounds, since such a move cannot be the best.
+    """
+    (m, n, k), cells, move, mover, depth, alpha = task
+    if (m, n, k) not in games:
+        games[(m, n, k)] = mnk.Game(m, n, k)
+    game = games[(m, n, k)]
+    opponent = ttt.O if mover == ttt.X else ttt.X
+
+    # Tasks sent together share one unpickled copy of the cells
+    cells = cells[:]
+    cells[move] = mover
+
+    search_stats = stats.SearchStats("parallel_worker")
+    value = -game.negamax(cells, opponent, mover, depth - 1,
+                          -mnk.WIN - 1, -alpha, move,
+                          cells.count(ttt.EMPTY), 1, None, search_stats)
+    return value, search_stats.nodes_expanded
+
+
+def mnk_minimax(game, board, depth, processes=None):
+    """
+    Returns the best action for the current player on an m,n,k board
+    at a fixed search depth, searching each move in a separate worker.
+    """
+    if game.terminal(board):
+        return None
+
+    cells = [cell for row in board for cell in row]
+    mover = game.player(board)
+    moves = game.ordered_moves(cells)
+    shape = (game.m, game.n, game.k)
+
+    search_stats = stats.SearchStats(f"parallel_mnk_{game.m}x{game.n}x{game.k}")
+    best, nodes = mnk_move_value(
+        (shape, cells, moves[0], mover, depth, -mnk.WIN - 1)
+    )
+    search_stats.nodes_expanded += nodes
+    best_move = moves[0]
+
+    results = get_pool(processes).map(
+        mnk_move_value,
+        [(shape, cells, move, mover, depth, best) for move in moves[1:]]
+    )
+    for move, (value, nodes) in zip(moves[1:], results):
+        search_stats.nodes_expanded += nodes
+        if value > best:
+            best_move, best = move, value
+    search_stats.finish()
+    return divmod(best_move, game.n)
@@ -3,6 +3,12 @@ import sys
 import time
 
 import tictactoe as ttt
+from worker import MoveWorker
+import stats
+
+# Print search statistics for every AI move
+if "--stats" in sys.argv[1:]:
+    stats.add_hook(stats.print_stats)
 
 pygame.init()
 size = width, height = 600, 400
@@ -19,7 +25,7 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai = MoveWorker("book")
 
 while True:
 
@@ -102,7 +108,9 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            # Dots cycle while the worker searches
+            dots = "." * (1 + pygame.time.get_ticks() // 400 % 3)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,13 +118,12 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if not ai.thinking:
+                ai.request(board)
             else:
-                ai_turn = True
+                move = ai.poll()
+                if move is not None:
+                    board = ttt.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,6 +134,23 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
+        # Restart at any time, dropping a move still being searched for
+        if not game_over:
+            resetButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+            reset = mediumFont.render("Reset", True, black)
+            resetRect = reset.get_rect()
+            resetRect.center = resetButton.center
+            pygame.draw.rect(screen, white, resetButton)
+            screen.blit(reset, resetRect)
+            click, _, _ = pygame.mouse.get_pressed()
+            if click == 1:
+                mouse = pygame.mouse.get_pos()
+                if resetButton.collidepoint(mouse):
+                    time.sleep(0.2)
+                    user = None
+                    board = ttt.initial_state()
+                    ai.cancel()
+
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
             again = mediumFont.render("Play Again", True, black)
@@ -141,6 +165,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai.cancel()
 
     pygame.display.flip()
@@ -0,0 +1,154 @@
+"""
+Self-play tournament between tictactoe engines
+
+Every pair of engines plays the same games from random openings, once
+with each as X. Every move an engine makes is checked against the
+minimax value of the position, and the run fails if an engine ever
+plays a move that loses value, such as losing a game it could draw.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import bitboard
+import parallel
+import tictactoe as ttt
+from benchmark import key, positions
+import stats
+
+
+def bitboard_move(board):
+    """Returns the alpha-beta move found on the board's bitboard."""
+    return bitboard.minimax(bitboard.from_board(board), "alphabeta")
+
+
+def random_move(board):
+    """Returns a random available move, as a baseline to play against."""
+    return random.choice(sorted(ttt.actions(board)))
+
+
+# Engines that can take part, by name
+PLAYERS = {
+    "minimax": ttt.minimax,
+    "alphabeta": ttt.alphabeta,
+    "memoized": ttt.memoized,
+    "book": ttt.book_move,
+    "parallel": ttt.parallel_move,
+    "bitboard": bitboard_move,
+    "random": random_move
+}
+
+# Engines allowed to play moves that lose value
+UNCHECKED = {"random"}
+
+
+def opening(plies, rng):
+    """
+    Returns a board after plies random moves that do not end the game.
+    """
+    while True:
+        board = ttt.initial_state()
+        for _ in range(plies):
+            if ttt.terminal(board):
+                break
+            board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+        if not ttt.terminal(board):
+            return board
+
+
+def play(board, engines, values, timings, nodes, searches):
+    """
+    Plays a game from board with engines[ttt.X] and engines[ttt.O],
+    adding each engine's thinking time to timings and the nodes its
+    searches expand, as reported to searches, to nodes.
+
+    Returns the winner, or None for a draw, and the number of moves
+    played. Exits if a checked engine plays a move losing value.
+    """
+    moves = 0
+    while not ttt.terminal(board):
+        mover = ttt.player(board)
+        name = engines[mover]
+
+        start = time.perf_counter()
+        move = PLAYERS[name](board)
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+        nodes[name] = nodes.get(name, 0) + sum(
+            search_stats.nodes_expanded for search_stats in searches
+        )
+        searches.clear()
+
+        child = ttt.result(board, move)
+        if name not in UNCHECKED and values[key(child)] != values[key(board)]:
+            sys.exit(f"{name} as {mover} plays {move} from {key(board)}: "
+                     f"value {values[key(board)]} becomes "
+                     f"{values[key(child)]}")
+        board = child
+        moves += 1
+    return ttt.winner(board), moves
+
+
+def tournament(names, games, plies, seed):
+    """
+    Plays games openings between every pair of engines with each as X,
+    printing outcome tallies and throughput.
+    """
+    values = positions()
+    rng = random.Random(seed)
+    random.seed(seed)
+    openings = [opening(plies, rng) for _ in range(games)]
+
+    timings = {}
+    nodes = {}
+    searches = []
+    stats.add_hook(searches.append)
+    played = moves_played = 0
+    print(f"{'X':>10} {'O':>10} {'X wins':>7} {'O wins':>7} {'draws':>7}")
+    start = time.perf_counter()
+    for x in names:
+        for o in names:
+            if x == o and len(names) > 1:
+                continue
+            tally = {ttt.X: 0, ttt.O: 0, None: 0}
+            for board in openings:
+                winner, moves = play([row[:] for row in board],
+                                     {ttt.X: x, ttt.O: o}, values, timings,
+                                     nodes, searches)
+                tally[winner] += 1
+                played += 1
+                moves_played += moves
+            print(f"{x:>10} {o:>10} {tally[ttt.X]:>7} {tally[ttt.O]:>7} "
+                  f"{tally[None]:>7}")
+    elapsed = time.perf_counter() - start
+    stats.remove_hook(searches.append)
+    parallel.close()
+
+    searched = sum(nodes.values())
+    print()
+    print(f"{played} games, {moves_played} moves, {searched} positions "
+          f"searched in {elapsed:.3f}s")
+    print(f"{played / elapsed:.1f} games/s, {moves_played / elapsed:.1f} "
+          f"moves/s, {searched / elapsed:.1f} positions/s")
+    for name in names:
+        print(f"{name:>10} {timings.get(name, 0):>9.3f}s thinking, "
+              f"{nodes.get(name, 0):>8} positions searched")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+",
+                        default=["alphabeta", "memoized", "book", "bitboard"],
+                        choices=list(PLAYERS), help="engines taking part")
+    parser.add_argument("--games", type=int, default=20,
+                        help="openings played by each pair of engines")
+    parser.add_argument("--plies", type=int, default=2,
+                        help="random moves in each opening")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    tournament(args.engines, args.games, args.plies, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,55 @@
 Tic Tac Toe Player
 """
 
+import os
+import sys
+from collections import OrderedDict
 from copy import deepcopy
 
+# Search stats come from Week 0/shared, as in the degrees project
+SHARED_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "shared")
+if SHARED_DIRECTORY not in sys.path:
+    sys.path.insert(0, SHARED_DIRECTORY)
+import stats
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Center first, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Opening book of the best move in every position, written by book.py
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_MAGIC = b"TTTBOOK1"
+BOOK_SIZE = 3 ** 9
+
+# Book entry of positions without a move
+NO_MOVE = 255
+
+# Positions kept by the transposition table before the oldest are evicted
+TABLE_SIZE = 100000
+
+# Cell indices of the flattened board under each rotation and reflection
+SYMMETRIES = [
+    [3 * i + j for i in range(3) for j in range(3)],
+    [3 * (2 - j) + i for i in range(3) for j in range(3)],
+    [3 * (2 - i) + (2 - j) for i in range(3) for j in range(3)],
+    [3 * j + (2 - i) for i in range(3) for j in range(3)],
+    [3 * i + (2 - j) for i in range(3) for j in range(3)],
+    [3 * (2 - i) + j for i in range(3) for j in range(3)],
+    [3 * j + i for i in range(3) for j in range(3)],
+    [3 * (2 - j) + (2 - i) for i in range(3) for j in range(3)]
+]
+
+# Every row, column and diagonal
+LINES = ([[(i, j) for j in range(3)] for i in range(3)]
+         + [[(i, j) for i in range(3)] for j in range(3)]
+         + [[(i, i) for i in range(3)], [(i, 2 - i) for i in range(3)]])
+
 
 def initial_state():
     """
@@ -158,12 +201,17 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, engine="minimax"):
     """
     Returns the optimal action for the current player on the board.
+
+    engine selects the search: "minimax" walks the whole game tree and
+    the others are faster searches returning equally good moves.
     """
+    if engine != "minimax":
+        return ENGINES[engine](board)
 
-    def maxValue(state):
+    def maxValue(state, depth):
         """
         Picks the action with the highest value of minValue()
         """
@@ -177,10 +225,12 @@ def minimax(board):
         v = -5
 
         # Loop through each possible action
+        search_stats.expand(depth)
+        search_stats.neighbor_calls += 1
         for action in actions(state):
 
             # Find the minimum value from the result of each action
-            temp = minValue(result(state, action))[0]
+            temp = minValue(result(state, action), depth + 1)[0]
 
             # Choose the largest minimum value
             if temp > v:
@@ -190,7 +240,7 @@ def minimax(board):
         return v, best_action
 
 
-    def minValue(state):
+    def minValue(state, depth):
         """
         Picks the action with the lowest value of maxVlaue()
         """
@@ -204,10 +254,12 @@ def minimax(board):
         v = 5
 
         # Loop through each possible action
+        search_stats.expand(depth)
+        search_stats.neighbor_calls += 1
         for action in actions(state):
 
             # Find the maxiumum value from the result of each action
-            temp = maxValue(result(state, action))[0]
+            temp = maxValue(result(state, action), depth + 1)[0]
 
             # Choose the smallest maximum value
             if temp < v:
@@ -223,8 +275,270 @@ def minimax(board):
 
     current_player = player(board)
 
+    # Frontier peak is the deepest line searched
+    search_stats = stats.SearchStats("minimax")
+
     # Return value based on whose turn it is
     if current_player == X:
-        return maxValue(board)[1]
+        move = maxValue(board, 1)[1]
     else:
-        return minValue(board)[1]
+        move = minValue(board, 1)[1]
+    search_stats.finish()
+    return move
+
+
+def completes_line(board, action, mark):
+    """
+    Returns True if placing mark at action completes a line of mark.
+    """
+    for line in LINES:
+        if action in line and all(
+            cell == action or board[cell[0]][cell[1]] == mark
+            for cell in line
+        ):
+            return True
+    return False
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board, most promising first:
+    winning moves, then blocking moves, then center, corners and edges.
+    """
+    current = player(board)
+    opponent = O if current == X else X
+    available = [action for action in MOVE_ORDER
+                 if board[action[0]][action[1]] == EMPTY]
+
+    def priority(action):
+        if completes_line(board, action, current):
+            return 0
+        if completes_line(board, action, opponent):
+            return 1
+        return 2
+
+    return sorted(available, key=priority)
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board,
+    pruning branches with alpha-beta search over ordered moves.
+    """
+
+    def maxValue(state, alpha, beta, depth):
+        """
+        Picks the action with the highest value of minValue(),
+        stopping once it is at least beta
+        """
+        if terminal(state):
+            return utility(state), ()
+
+        search_stats.expand(depth)
+        search_stats.neighbor_calls += 1
+        v, best_action = -5, ()
+        for action in ordered_actions(state):
+            temp = minValue(result(state, action), alpha, beta, depth + 1)[0]
+            if temp > v:
+                v, best_action = temp, action
+            if v >= beta or v == 1:
+                break
+            alpha = max(alpha, v)
+        return v, best_action
+
+    def minValue(state, alpha, beta, depth):
+        """
+        Picks the action with the lowest value of maxValue(),
+        stopping once it is at most alpha
+        """
+        if terminal(state):
+            return utility(state), ()
+
+        search_stats.expand(depth)
+        search_stats.neighbor_calls += 1
+        v, best_action = 5, ()
+        for action in ordered_actions(state):
+            temp = maxValue(result(state, action), alpha, beta, depth + 1)[0]
+            if temp < v:
+                v, best_action = temp, action
+            if v <= alpha or v == -1:
+                break
+            beta = min(beta, v)
+        return v, best_action
+
+    if terminal(board):
+        return None
+
+    search_stats = stats.SearchStats("alphabeta")
+    if player(board) == X:
+        move = maxValue(board, -5, 5, 1)[1]
+    else:
+        move = minValue(board, -5, 5, 1)[1]
+    search_stats.finish()
+    return move
+
+
+def canonical(board):
+    """
+    Returns a string key shared by the board and all of its rotations
+    and reflections.
+    """
+    cells = "".join(cell or "." for row in board for cell in row)
+    return min("".join(cells[i] for i in symmetry) for symmetry in SYMMETRIES)
+
+
+class TranspositionTable():
+    """
+    Bounded cache of position values keyed by canonical board, evicting
+    the least recently used position when full.
+    """
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, key):
+        """Returns the cached value of a position, or None."""
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.values.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        """Caches the value of a position."""
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if len(self.values) > self.size:
+            self.values.popitem(last=False)
+
+    def hit_rate(self):
+        """Returns the fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Empties the cache and resets its counters."""
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by memoized searches so later moves reuse earlier work
+transpositions = TranspositionTable()
+
+
+def memoized(board, table=None):
+    """
+    Returns the optimal action for the current player on the board,
+    caching the value of every position searched in a transposition
+    table, which defaults to the shared one.
+    """
+    if table is None:
+        table = transpositions
+
+    def value(state, depth):
+        """
+        Returns the minimax value of the state
+        """
+        key = canonical(state)
+        cached = table.get(key)
+        if cached is not None:
+            return cached
+
+        if terminal(state):
+            v = utility(state)
+        else:
+            search_stats.expand(depth)
+            search_stats.neighbor_calls += 1
+            children = (value(result(state, action), depth + 1)
+                        for action in ordered_actions(state))
+            v = max(children) if player(state) == X else min(children)
+        table.store(key, v)
+        return v
+
+    if terminal(board):
+        return None
+
+    search_stats = stats.SearchStats("memoized")
+    choose = max if player(board) == X else min
+    move = choose(ordered_actions(board),
+                  key=lambda action: value(result(board, action), 2))
+    search_stats.finish()
+    return move
+
+
+def encode(board):
+    """
+    Returns the index of the board in the opening book, reading the
+    cells as base 3 digits.
+    """
+    index = 0
+    for row in board:
+        for cell in row:
+            index = 3 * index + (1 if cell == X else 2 if cell == O else 0)
+    return index
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the opening book table at path, or None if it is missing
+    or invalid.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(BOOK_MAGIC) or len(data) != len(BOOK_MAGIC) + BOOK_SIZE:
+        return None
+    return data[len(BOOK_MAGIC):]
+
+
+# Opening book table once loaded, or False if it could not be
+book = None
+
+
+def book_move(board):
+    """
+    Returns the optimal action for the current player on the board from
+    the opening book, searching with alphabeta if the book is missing.
+    """
+    global book
+    if book is None:
+        book = load_book() or False
+
+    if terminal(board):
+        return None
+    if book:
+        cell = book[encode(board)]
+        if cell != NO_MOVE:
+            # Answered without expanding anything
+            stats.SearchStats("book").finish()
+            return (cell // 3, cell % 3)
+    return alphabeta(board)
+
+
+def parallel_move(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching each available move in a separate process.
+    """
+    # Imported here since parallel.py imports this module
+    import parallel
+    return parallel.minimax(board)
+
+
+# Searches minimax can use instead of the full tree walk
+ENGINES = {
+    "alphabeta": alphabeta,
+    "memoized": memoized,
+    "book": book_move,
+    "parallel": parallel_move
+}
@@ -0,0 +1,81 @@
+"""
+AI moves computed on a background thread, so the game window keeps
+drawing and handling input while the computer thinks.
+"""
+
+import threading
+import time
+
+import tictactoe as ttt
+
+
+class MoveWorker():
+    """
+    Searches for one AI move at a time on a background thread.
+
+    Every request gets a new generation number. Results of searches
+    from an older generation, such as one running when the game was
+    reset, are thrown away when they finish.
+    """
+    def __init__(self, engine="book", delay=0.5):
+        self.engine = engine
+        self.delay = delay
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.move = None
+        self.ready = False
+        self.started = None
+
+    def request(self, board):
+        """
+        Starts searching for a move on a copy of the board.
+        """
+        with self.lock:
+            self.generation += 1
+            self.move = None
+            self.ready = False
+            self.started = time.perf_counter()
+            generation = self.generation
+        board = [row[:] for row in board]
+        thread = threading.Thread(target=self.search,
+                                  args=(board, generation), daemon=True)
+        thread.start()
+
+    def search(self, board, generation):
+        """Runs on the worker thread, storing the move if still wanted."""
+        move = ttt.minimax(board, self.engine)
+        with self.lock:
+            if generation == self.generation:
+                self.move = move
+                self.ready = True
+
+    def cancel(self):
+        """
+        Forgets the move being searched for, if any.
+        """
+        with self.lock:
+            self.generation += 1
+            self.move = None
+            self.ready = False
+            self.started = None
+
+    @property
+    def thinking(self):
+        """True while a requested move has not been taken."""
+        return self.started is not None
+
+    def poll(self):
+        """
+        Returns the requested move once it is found and at least delay
+        seconds have passed since the request, otherwise None.
+        """
+        with self.lock:
+            if not self.ready:
+                return None
+            if time.perf_counter() - self.started < self.delay:
+                return None
+            move = self.move
+            self.move = None
+            self.ready = False
+            self.started = None
+            return move
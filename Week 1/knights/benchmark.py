@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+
+from logic import KnowledgeBase, backbone, model_check
+from puzzle import (AKnight, AKnave, BKnight, BKnave, CKnight, CKnave,
+                    knowledge0, knowledge1, knowledge2, knowledge3)
+
+SYMBOLS = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+PUZZLES = [knowledge0, knowledge1, knowledge2, knowledge3]
+
+ENGINES = ["enumerate", "compiled", "truthtable", "sat"]
+
+
+def with_engine(engine):
+    """
+    Returns the answers to every symbol of every puzzle, calling
+    model_check once per query.
+    """
+    return [[model_check(knowledge, symbol, engine) for symbol in SYMBOLS]
+            for knowledge in PUZZLES]
+
+
+def with_knowledge_base():
+    """
+    Returns the answers to every symbol of every puzzle, asking one
+    KnowledgeBase per puzzle.
+    """
+    answers = []
+    for knowledge in PUZZLES:
+        kb = KnowledgeBase(knowledge)
+        answers.append([kb.entails(symbol) for symbol in SYMBOLS])
+    return answers
+
+
+def with_backbone(engine):
+    """
+    Returns the answers to every symbol of every puzzle from one
+    backbone computation per puzzle.
+    """
+    answers = []
+    for knowledge in PUZZLES:
+        forced = backbone(knowledge, engine=engine)
+        answers.append([forced is None or forced.get(symbol.name) is True
+                        for symbol in SYMBOLS])
+    return answers
+
+
+def timed(solve, repeat):
+    """
+    Returns the answers of solve and its best time over repeat runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        answers = solve()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return answers, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="timing runs of each way of answering")
+    args = parser.parse_args()
+
+    solvers = [(engine, lambda engine=engine: with_engine(engine))
+               for engine in ENGINES]
+    solvers.append(("knowledgebase", with_knowledge_base))
+    solvers += [(f"backbone {engine}",
+                 lambda engine=engine: with_backbone(engine))
+                for engine in ["truthtable", "sat"]]
+
+    queries = len(PUZZLES) * len(SYMBOLS)
+    print(f"{queries} queries: every symbol of every puzzle")
+    print()
+    print(f"{'engine':>19} {'seconds':>9} {'queries/s':>10} {'speedup':>8}")
+    expected = baseline = None
+    for name, solve in solvers:
+        answers, elapsed = timed(solve, args.repeat)
+        if expected is None:
+            expected, baseline = answers, elapsed
+        elif answers != expected:
+            sys.exit(f"{name} answers {answers}, expected {expected}")
+        print(f"{name:>19} {elapsed:>9.5f} {queries / elapsed:>10.0f} "
+              f"{baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,91 @@
 import itertools
+import math
+import multiprocessing
+import weakref
+from collections import namedtuple
+
+# Symbols evaluated together as the bits of one truth table column; any
+# more are enumerated one assignment at a time around the columns
+TABLE_BITS = 20
+
+# Deepest nesting compiled to Python source; the parser rejects much
+# deeper expressions, so those are compiled to closures instead
+COMPILE_DEPTH = 100
+
+# Number of models of a knowledge base, and the values of the symbols
+# that are the same in all of them, or None if there are no models
+Summary = namedtuple("Summary", ["count", "backbone"])
+
+# Interned sentences by class and operands, dropped once unused
+interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    __slots__ = ("_hash", "_symbols", "_interned", "__weakref__")
+
+    def __new__(cls, *args):
+        sentence = super().__new__(cls)
+        sentence._hash = None
+        sentence._symbols = None
+        sentence._interned = False
+        return sentence
+
+    def __reduce__(self):
+        return (rebuild, (type(self), self.arguments(), self._interned))
+
+    def __hash__(self):
+        if self._hash is not None:
+            return self._hash
+        value = hash(self.hash_key())
+
+        # Only interned sentences can no longer change
+        if self._interned:
+            self._hash = value
+        return value
+
+    def hash_key(self):
+        """Returns a tuple whose hash is the sentence's hash."""
+        return ()
+
+    def arguments(self):
+        """Returns the arguments that construct an equal sentence."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def truth_table(self, columns, mask):
+        """
+        Evaluates the logical sentence in many models at once. Bit i of
+        each symbol's column is its value in model i, and bit i of the
+        result is the sentence's value in model i.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """
+        Returns the symbols in the logical sentence, computed once if
+        the sentence is interned.
+        """
+        if self._symbols is not None:
+            return self._symbols
+        symbols = self.collect_symbols()
+        if self._interned:
+            self._symbols = symbols
+        return symbols
+
+    def collect_symbols(self):
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +115,20 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        if self._hash is None:
+            self._hash = hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -62,23 +139,40 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def truth_table(self, columns, mask):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def arguments(self):
+        return (self.name,)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def collect_symbols(self):
+        return frozenset([self.name])
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, "_interned", False):
+            return False
         return isinstance(other, Not) and self.operand == other.operand
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("not", hash(self.operand))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +180,38 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def truth_table(self, columns, mask):
+        return ~self.operand.truth_table(columns, mask) & mask
+
+    def arguments(self):
+        return (self.operand,)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def collect_symbols(self):
+        return self.operand.symbol_set()
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, "_interned", False):
+            return False
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +220,57 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Adds a conjunct, unless the conjunction is interned."""
+        if self._interned:
+            raise Exception("interned sentences cannot be changed")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def truth_table(self, columns, mask):
+        table = mask
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(columns, mask)
+            if not table:
+                break
+        return table
+
+    def arguments(self):
+        return tuple(self.conjuncts)
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def collect_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, "_interned", False):
+            return False
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,17 +279,32 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def truth_table(self, columns, mask):
+        table = 0
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(columns, mask)
+            if table == mask:
+                break
+        return table
+
+    def arguments(self):
+        return tuple(self.disjuncts)
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def collect_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -169,12 +312,18 @@ class Implication(Sentence):
         self.consequent = consequent
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, "_interned", False):
+            return False
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("implies", hash(self.antecedent), hash(self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,16 +332,25 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def truth_table(self, columns, mask):
+        return ((~self.antecedent.truth_table(columns, mask) & mask)
+                | self.consequent.truth_table(columns, mask))
+
+    def arguments(self):
+        return (self.antecedent, self.consequent)
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def collect_symbols(self):
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -200,33 +358,378 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, "_interned", False):
+            return False
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("biconditional", hash(self.left), hash(self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def truth_table(self, columns, mask):
+        return ~(self.left.truth_table(columns, mask)
+                 ^ self.right.truth_table(columns, mask)) & mask
+
+    def arguments(self):
+        return (self.left, self.right)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def collect_symbols(self):
+        return self.left.symbol_set() | self.right.symbol_set()
+
+
+def intern(sentence):
+    """
+    Returns the one shared copy of a sentence equal to sentence, so
+    that equal subsentences of large knowledge bases are stored once
+    and compared by identity. Interned sentences cannot be changed.
+    """
+    if sentence._interned:
+        return sentence
+    arguments = tuple(
+        intern(argument) if isinstance(argument, Sentence) else argument
+        for argument in sentence.arguments()
+    )
+    key = (type(sentence), arguments)
+    shared = interned.get(key)
+    if shared is None:
+        shared = type(sentence)(*arguments)
+        shared._interned = True
+        interned[key] = shared
+    return shared
+
+
+def rebuild(cls, arguments, is_interned):
+    """Returns a sentence restored by pickle, interned if it was."""
+    sentence = cls(*arguments)
+    return intern(sentence) if is_interned else sentence
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function of a sequence of bools, the values of symbols in
+    order, that evaluates the sentence without walking its tree.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    try:
+        source = sentence_source(sentence, index, 0)
+    except RecursionError:
+        source = None
+    if source is None:
+        return sentence_closure(sentence, index)
+    return eval(compile(f"lambda v: {source}", "<sentence>", "eval"))
+
+
+def sentence_source(sentence, index, depth):
+    """
+    Returns a Python expression evaluating the sentence over the list
+    v of symbol values.
+    """
+    if depth > COMPILE_DEPTH:
+        raise RecursionError("sentence nested too deeply to compile")
+    depth += 1
+    if isinstance(sentence, Symbol):
+        if sentence.name not in index:
+            raise Exception(f"variable {sentence.name} not in model")
+        return f"v[{index[sentence.name]}]"
+    if isinstance(sentence, Not):
+        return f"(not {sentence_source(sentence.operand, index, depth)})"
+    if isinstance(sentence, And):
+        if not sentence.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            sentence_source(conjunct, index, depth)
+            for conjunct in sentence.conjuncts
+        ) + ")"
+    if isinstance(sentence, Or):
+        if not sentence.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            sentence_source(disjunct, index, depth)
+            for disjunct in sentence.disjuncts
+        ) + ")"
+    if isinstance(sentence, Implication):
+        antecedent = sentence_source(sentence.antecedent, index, depth)
+        consequent = sentence_source(sentence.consequent, index, depth)
+        return f"(not {antecedent} or {consequent})"
+    if isinstance(sentence, Biconditional):
+        left = sentence_source(sentence.left, index, depth)
+        right = sentence_source(sentence.right, index, depth)
+        return f"({left} == {right})"
+    raise TypeError("must be a logical sentence")
+
+
+def sentence_closure(sentence, index):
+    """
+    Returns a function evaluating the sentence over a list of symbol
+    values, built from nested closures.
+    """
+    if isinstance(sentence, Symbol):
+        if sentence.name not in index:
+            raise Exception(f"variable {sentence.name} not in model")
+        i = index[sentence.name]
+        return lambda v: v[i]
+    if isinstance(sentence, Not):
+        operand = sentence_closure(sentence.operand, index)
+        return lambda v: not operand(v)
+    if isinstance(sentence, And):
+        conjuncts = [sentence_closure(conjunct, index)
+                     for conjunct in sentence.conjuncts]
+        return lambda v: all(conjunct(v) for conjunct in conjuncts)
+    if isinstance(sentence, Or):
+        disjuncts = [sentence_closure(disjunct, index)
+                     for disjunct in sentence.disjuncts]
+        return lambda v: any(disjunct(v) for disjunct in disjuncts)
+    if isinstance(sentence, Implication):
+        antecedent = sentence_closure(sentence.antecedent, index)
+        consequent = sentence_closure(sentence.consequent, index)
+        return lambda v: not antecedent(v) or consequent(v)
+    if isinstance(sentence, Biconditional):
+        left = sentence_closure(sentence.left, index)
+        right = sentence_closure(sentence.right, index)
+        return lambda v: left(v) == right(v)
+    raise TypeError("must be a logical sentence")
+
+
+def truth_columns(count):
+    """
+    Returns the mask of all 2 ** count models and a column for each of
+    count symbols, where bit i of column j is bit j of i.
+    """
+    size = 1 << count
+    mask = (1 << size) - 1
+    columns = []
+    for j in range(count):
+        # 2 ** j zeros then 2 ** j ones, doubled until it fills every model
+        column = ((1 << (1 << j)) - 1) << (1 << j)
+        width = 1 << (j + 1)
+        while width < size:
+            column |= column << width
+            width <<= 1
+        columns.append(column)
+    return mask, columns
+
+
+def counter_model(knowledge, query, symbols, assignment=None):
+    """
+    Returns a model of the symbols where knowledge is true and query is
+    false, or None if there is none, checking up to 2 ** TABLE_BITS
+    models at a time as truth table columns. Symbols in assignment keep
+    the values it gives them.
+    """
+    assignment = assignment or {}
+    symbols = sorted(set(symbols) - set(assignment))
+    table_symbols = symbols[:TABLE_BITS]
+    fixed_symbols = symbols[TABLE_BITS:]
+    mask, table_columns = truth_columns(len(table_symbols))
+
+    for values in itertools.product([False, True], repeat=len(fixed_symbols)):
+        columns = dict(zip(table_symbols, table_columns))
+        for symbol, value in zip(fixed_symbols, values):
+            columns[symbol] = mask if value else 0
+        for symbol, value in assignment.items():
+            columns[symbol] = mask if value else 0
+
+        # Models where knowledge holds but query does not
+        counter = knowledge.truth_table(columns, mask)
+        if counter:
+            counter &= ~query.truth_table(columns, mask)
+        if counter:
+            i = (counter & -counter).bit_length() - 1
+            model = {symbol: bool(i >> j & 1)
+                     for j, symbol in enumerate(table_symbols)}
+            model.update(zip(fixed_symbols, values))
+            model.update(assignment)
+            return model
+    return None
+
+
+def model_tables(knowledge, symbols):
+    """
+    Yields the truth table of knowledge over the symbols in blocks of up
+    to 2 ** TABLE_BITS models, with the columns and mask of each block.
+    """
+    symbols = sorted(symbols)
+    table_symbols = symbols[:TABLE_BITS]
+    fixed_symbols = symbols[TABLE_BITS:]
+    mask, table_columns = truth_columns(len(table_symbols))
+
+    for values in itertools.product([False, True], repeat=len(fixed_symbols)):
+        columns = dict(zip(table_symbols, table_columns))
+        for symbol, value in zip(fixed_symbols, values):
+            columns[symbol] = mask if value else 0
+        yield knowledge.truth_table(columns, mask), columns, mask
+
+
+def summarize(knowledge, symbols=None, engine="truthtable"):
+    """
+    Returns the Summary of knowledge over its symbols and any other
+    symbol names given, counting models and finding the backbone in one
+    pass.
+
+    engine is "truthtable" to check every model with bitwise operations
+    or "sat" to enumerate the models with a SAT solver. Both visit every
+    model; backbone() with engine "sat" finds the backbone without
+    counting, which stays fast when there are very many models.
+    """
+    symbols = knowledge.symbols() | set(symbols or ())
+    if engine == "sat":
+        # Imported here since sat.py imports this module
+        import sat
+        return sat.summarize(knowledge, symbols)
+    if engine != "truthtable":
+        raise ValueError(f"unknown engine {engine}")
+
+    count = 0
+    always_true = set(symbols)
+    always_false = set(symbols)
+    for table, columns, mask in model_tables(knowledge, symbols):
+        if not table:
+            continue
+        count += bin(table).count("1")
+        always_true = {symbol for symbol in always_true
+                       if not table & ~columns[symbol] & mask}
+        always_false = {symbol for symbol in always_false
+                        if not table & columns[symbol]}
+
+    if count == 0:
+        return Summary(0, None)
+    backbone = dict.fromkeys(sorted(always_true), True)
+    backbone.update(dict.fromkeys(sorted(always_false), False))
+    return Summary(count, backbone)
+
+
+def count_models(knowledge, symbols=None, engine="truthtable"):
+    """Returns the number of models of knowledge."""
+    return summarize(knowledge, symbols, engine).count
+
+
+def backbone(knowledge, symbols=None, engine="truthtable"):
+    """
+    Returns the value of every symbol that has the same value in all
+    models of knowledge, or None if knowledge has no models.
+    """
+    if engine == "sat":
+        # Finding the backbone needs no count of the models
+        import sat
+        return sat.backbone(knowledge, knowledge.symbols() | set(symbols or ()))
+    return summarize(knowledge, symbols, engine).backbone
+
+
+def models(knowledge, symbols=None, engine="truthtable"):
+    """
+    Yields every model of knowledge as a dict of symbol values.
+    """
+    symbols = knowledge.symbols() | set(symbols or ())
+    if engine == "sat":
+        import sat
+        yield from sat.models(knowledge, symbols)
+        return
+    if engine != "truthtable":
+        raise ValueError(f"unknown engine {engine}")
+
+    for table, columns, mask in model_tables(knowledge, symbols):
+        while table:
+            bit = table & -table
+            table ^= bit
+            yield {symbol: bool(column & bit)
+                   for symbol, column in sorted(columns.items())}
+
+
+# Knowledge base and query of the parallel check a worker process is in
+partition_problem = None
+
+
+def start_partition_worker(knowledge, query, symbols):
+    """Receives the problem once per worker process."""
+    global partition_problem
+    partition_problem = (knowledge, query, symbols)
+
+
+def check_partition(assignment):
+    """Returns a counter-model with the assigned values, if any."""
+    knowledge, query, symbols = partition_problem
+    return counter_model(knowledge, query, symbols, assignment)
+
+
+def parallel_counter_model(knowledge, query, processes=None, split=None):
+    """
+    Returns a model where knowledge is true and query is false, or None
+    if knowledge entails query, checking partitions of the models in
+    a pool of processes.
+
+    The first split symbols are fixed to each of their 2 ** split
+    combinations, one partition each, and the pool stops as soon as
+    any partition has a counter-model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    processes = processes or multiprocessing.cpu_count()
+    if split is None:
+        # A few partitions per process, so that one slow partition
+        # does not leave the others idle
+        split = math.ceil(math.log2(4 * processes))
+    split = min(split, len(symbols))
+
+    partitions = [dict(zip(symbols[:split], values))
+                  for values in itertools.product([False, True],
+                                                  repeat=split)]
+    with multiprocessing.Pool(processes, start_partition_worker,
+                              (knowledge, query, symbols)) as pool:
+        for model in pool.imap_unordered(check_partition, partitions):
+            if model is not None:
+                # Leaving the block terminates the remaining checks
+                return model
+    return None
+
+
+def model_check(knowledge, query, engine="truthtable"):
+    """
+    Checks if knowledge base entails query.
+
+    engine is "truthtable" to evaluate every model at once with bitwise
+    operations, "compiled" to evaluate compiled sentences one model at
+    a time, "enumerate" to evaluate the sentence trees one model at a
+    time, "sat" to search for a counter-model with a SAT solver,
+    which scales to knowledge bases with hundreds of symbols, or
+    "parallel" to split the truth table checks across processes. Use
+    parallel_counter_model() to get the model that breaks entailment.
+    """
+    if engine == "sat":
+        # Imported here since sat.py imports this module
+        import sat
+        return sat.entails(knowledge, query)
+    if engine == "parallel":
+        return parallel_counter_model(knowledge, query) is None
+    if engine == "truthtable":
+        symbols = set.union(knowledge.symbols(), query.symbols())
+        return counter_model(knowledge, query, symbols) is None
+    if engine == "compiled":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        holds = compile_sentence(knowledge, symbols)
+        query_holds = compile_sentence(query, symbols)
+        return all(
+            query_holds(values)
+            for values in itertools.product([True, False],
+                                            repeat=len(symbols))
+            if holds(values)
+        )
+    if engine != "enumerate":
+        raise ValueError(f"unknown engine {engine}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +764,212 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def literal(sentence):
+    """
+    Returns (name, value) if the sentence is a symbol or a negated
+    symbol, otherwise None.
+    """
+    if isinstance(sentence, Symbol):
+        return (sentence.name, True)
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return (sentence.operand.name, False)
+    return None
+
+
+def clause(sentence):
+    """
+    Returns the sentence as a list of (name, value) literals, one of
+    which must hold, or None if it is not a simple disjunction.
+    """
+    if literal(sentence) is not None:
+        return [literal(sentence)]
+    if isinstance(sentence, Or):
+        literals = [literal(disjunct) for disjunct in sentence.disjuncts]
+    elif isinstance(sentence, Implication):
+        literals = [literal(sentence.antecedent), literal(sentence.consequent)]
+        if literals[0] is not None:
+            literals[0] = (literals[0][0], not literals[0][1])
+    elif isinstance(sentence, Not) and isinstance(sentence.operand, And):
+        literals = [literal(conjunct) for conjunct in sentence.operand.conjuncts]
+        literals = [None if other is None else (other[0], not other[1])
+                    for other in literals]
+    else:
+        return None
+    return None if None in literals else literals
+
+
+class KnowledgeBase():
+    """
+    Sentences known to be true, added one at a time, that answer many
+    entailment queries while reusing work between them.
+
+    Three caches are kept:
+    - facts: symbols whose values follow from unit propagation over the
+      sentences that are simple disjunctions, answering those queries
+      without checking any models
+    - the truth table of the models of every sentence so far, which a
+      new sentence narrows with one bitwise and instead of starting
+      over; past TABLE_BITS symbols a SAT solver keeps the sentences as
+      clauses instead, along with the clauses it learns
+    - answers to earlier queries, of which the entailed ones still hold
+      after more sentences are added
+    """
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.known = set()
+        self.clauses = []
+        self.facts = {}
+        self.contradiction = False
+        self.order = []
+        self.table = 1
+        self.symbol_columns = None
+        self.formula = None
+        self.answers = {}
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence known to be true.
+        """
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+            return
+        self.sentences.append(sentence)
+
+        # Earlier queries that were not entailed may be now
+        self.answers = {query: answer
+                        for query, answer in self.answers.items() if answer}
+
+        literals = clause(sentence)
+        if literals is not None:
+            self.clauses.append(literals)
+            self.propagate()
+
+        self.known |= sentence.symbol_set()
+        self.include(sentence.symbol_set())
+        if self.formula is not None:
+            self.formula.add(sentence)
+        else:
+            self.table &= sentence.truth_table(self.columns(), self.mask())
+
+    def propagate(self):
+        """
+        Adds to facts every literal forced by a clause whose other
+        literals are all false.
+        """
+        changed = True
+        while changed and not self.contradiction:
+            changed = False
+            for literals in self.clauses:
+                open_literals = []
+                for name, value in literals:
+                    if name not in self.facts:
+                        open_literals.append((name, value))
+                    elif self.facts[name] == value:
+                        break
+                else:
+                    if not open_literals:
+                        self.contradiction = True
+                        break
+                    if len(open_literals) == 1:
+                        name, value = open_literals[0]
+                        self.facts[name] = value
+                        changed = True
+
+    def include(self, symbols):
+        """
+        Extends the truth table with symbols not yet in it, switching to
+        a SAT solver once there are more than TABLE_BITS.
+        """
+        new = sorted(symbols - set(self.order))
+        if not new:
+            return
+        for name in new:
+            # The models so far, once with the new symbol false and once
+            # with it true
+            if self.formula is None:
+                self.table |= self.table << (1 << len(self.order))
+            self.order.append(name)
+        self.symbol_columns = None
+
+        if self.formula is None and len(self.order) > TABLE_BITS:
+            # Imported here since sat.py imports this module
+            import sat
+            self.table = None
+            self.formula = sat.Formula()
+            for sentence in self.sentences:
+                self.formula.add(sentence)
+
+    def mask(self):
+        """Returns the bits of every model of the symbols."""
+        return (1 << (1 << len(self.order))) - 1
+
+    def columns(self):
+        """Returns the truth table column of each symbol."""
+        if self.symbol_columns is None:
+            _, columns = truth_columns(len(self.order))
+            self.symbol_columns = dict(zip(self.order, columns))
+        return self.symbol_columns
+
+    def entails(self, query):
+        """
+        Checks if the knowledge base entails query.
+        """
+        Sentence.validate(query)
+        if query in self.answers:
+            return self.answers[query]
+
+        fact = literal(query)
+        if self.contradiction:
+            answer = True
+        elif fact is not None and self.facts.get(fact[0]) == fact[1]:
+            answer = True
+        else:
+            self.include(query.symbol_set())
+            if self.formula is not None:
+                answer = self.formula.model([Not(query)]) is None
+            else:
+                counter = self.table & ~query.truth_table(self.columns(),
+                                                          self.mask())
+                answer = not counter
+
+        self.answers[query] = answer
+        return answer
+
+    def summarize(self, count=True):
+        """
+        Returns the Summary of the symbols in the sentences, from the
+        kept truth table when there is one.
+
+        Past TABLE_BITS symbols the backbone comes from the SAT solver,
+        but counting the models there means enumerating every one of
+        them, so with count False the count is left as None instead.
+        """
+        if self.formula is not None:
+            forced = self.formula.backbone(self.known)
+            if forced is None:
+                return Summary(0, None)
+            if not count:
+                return Summary(None, forced)
+            return Summary(count_models(And(*self.sentences), engine="sat"),
+                           forced)
+        if not self.table:
+            return Summary(0, None)
+
+        # Symbols only seen in queries double the models without
+        # constraining them
+        columns = self.columns()
+        mask = self.mask()
+        unconstrained = len(self.order) - len(self.known)
+        backbone = {}
+        for symbol in sorted(self.known):
+            if not self.table & ~columns[symbol] & mask:
+                backbone[symbol] = True
+            elif not self.table & columns[symbol]:
+                backbone[symbol] = False
+        return Summary(bin(self.table).count("1") >> unconstrained, backbone)
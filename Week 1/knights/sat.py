@@ -0,0 +1,501 @@
+"""
+SAT-based entailment for logic sentences
+
+Sentences are converted to clauses with the Tseitin transformation:
+every connective gets a new variable that is made equivalent to it, so
+the clauses grow linearly with the sentence instead of exponentially.
+A knowledge base entails a query exactly when the knowledge base is
+unsatisfiable together with the negated query, which a conflict-driven
+clause learning (CDCL) solver decides without enumerating models.
+
+Literals are nonzero integers: v for variable v being true and -v for
+it being false.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Summary, Symbol
+
+# Conflicts before the first restart, and the growth of that limit
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# Factor by which variable activity bumps grow after each conflict
+ACTIVITY_DECAY = 0.95
+
+
+class Solver():
+    """
+    A CDCL solver with two watched literals per clause, first unique
+    implication point clause learning and activity-ordered decisions.
+
+    Clauses can be added between calls to solve(), and learned clauses
+    are kept, so later calls reuse the work of earlier ones.
+    """
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+        self.watches = {}
+        self.unsatisfiable = False
+
+        # Per-variable state, indexed by variable
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.bump = 1.0
+
+        # True for each true literal and False for its negation, so the
+        # hot loops look literals up without checking their sign
+        self.truth = {}
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+
+    def new_variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches[self.count] = []
+        self.watches[-self.count] = []
+        return self.count
+
+    def value(self, literal):
+        """Returns True or False for an assigned literal, else None."""
+        return self.truth.get(literal)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current level for reason."""
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.truth[literal] = True
+        self.truth[-literal] = False
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def add_clause(self, literals):
+        """
+        Adds the disjunction of literals, which must not make the solver
+        inconsistent at any level but the first.
+        """
+        self.backtrack(0)
+        if self.unsatisfiable:
+            return
+
+        clause = []
+        for literal in dict.fromkeys(literals):
+            if -literal in clause:
+                # Always true, so never worth watching
+                return
+            value = self.value(literal)
+            if value is True:
+                return
+            if value is None:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores a clause, watching its first two literals."""
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one literal left.
+        Returns the index of a clause with every literal false, if any.
+        """
+        truth = self.truth
+        clauses = self.clauses
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false_literal]
+            kept = []
+            conflict = None
+
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Satisfied by the other watched literal
+                first = truth.get(clause[0])
+                if first:
+                    kept.append(index)
+                    continue
+
+                # Move the watch to any literal that is not false
+                for k in range(2, len(clause)):
+                    if truth.get(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first is False:
+                        conflict = index
+                        kept.extend(watching[position + 1:])
+                        break
+                    self.assign(clause[0], index)
+
+            self.watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, its asserting
+        literal first, and the level to jump back to.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump_activity(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest assignment involved in the conflict
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal assigned at the highest remaining level
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump_activity(self, variable):
+        """Makes a variable in a conflict more likely to be decided."""
+        self.activity[variable] += self.bump
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+
+    def backtrack(self, level):
+        """Undoes every assignment above level."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+            del self.truth[literal]
+            del self.truth[-literal]
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = min(self.head, start)
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity as a
+        literal in its last phase, or None if every variable is assigned.
+        """
+        best, best_activity = None, -1.0
+        for variable in range(1, self.count + 1):
+            if (self.values[variable] is None
+                    and self.activity[variable] > best_activity):
+                best, best_activity = variable, self.activity[variable]
+        if best is None:
+            return None
+        return best if self.phases[best] else -best
+
+    def solve(self, assumptions=()):
+        """
+        Returns a satisfying assignment as a list indexed by variable,
+        or None if the clauses and assumed literals are unsatisfiable.
+        """
+        if self.unsatisfiable:
+            return None
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.unsatisfiable = True
+            return None
+
+        conflicts = 0
+        restart_limit = RESTART_FIRST
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                conflicts += 1
+                if not self.trail_limits:
+                    self.unsatisfiable = True
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.bump /= ACTIVITY_DECAY
+                continue
+
+            if conflicts >= restart_limit:
+                conflicts = 0
+                restart_limit = int(restart_limit * RESTART_GROWTH)
+                self.backtrack(0)
+                continue
+
+            # Assumptions are the first decisions, one level each
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return None
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                model = self.values[:]
+                self.backtrack(0)
+                return model
+            self.trail_limits.append(len(self.trail))
+            self.assign(literal, None)
+
+
+class Formula():
+    """
+    Sentences added to a solver as Tseitin clauses, with one variable
+    per symbol and per distinct compound subsentence.
+    """
+    def __init__(self):
+        self.solver = Solver()
+        self.variables = {}
+        self.gates = {}
+        self.true = self.solver.new_variable()
+        self.solver.add_clause([self.true])
+
+    def variable(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to the sentence, adding clauses
+        defining a new variable for it if needed.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.gates:
+            return self.gates[sentence]
+
+        if isinstance(sentence, And):
+            gate = self.conjunction(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Or):
+            gate = -self.conjunction(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            gate = -self.conjunction([self.literal(sentence.antecedent),
+                                      -self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            gate = self.solver.new_variable()
+            add = self.solver.add_clause
+            add([-gate, -left, right])
+            add([-gate, left, -right])
+            add([gate, left, right])
+            add([gate, -left, -right])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.gates[sentence] = gate
+        return gate
+
+    def conjunction(self, literals):
+        """Returns a literal true exactly when all literals are true."""
+        if not literals:
+            return self.true
+        if len(literals) == 1:
+            return literals[0]
+        gate = self.solver.new_variable()
+        for literal in literals:
+            self.solver.add_clause([-gate, literal])
+        self.solver.add_clause([gate] + [-literal for literal in literals])
+        return gate
+
+    def add(self, sentence):
+        """Asserts that the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def backbone(self, names):
+        """
+        Returns the value of every symbol called one of names that has
+        the same value in all models, or None if there are no models.
+
+        Each candidate value is tested by looking for a model with the
+        opposite value, and every model found rules out all the
+        candidates it disagrees with. Forced values are added as
+        clauses, which later searches and queries also benefit from.
+        """
+        names = sorted(names)
+        for name in names:
+            self.variable(name)
+        model = self.model()
+        if model is None:
+            return None
+
+        candidates = {name: model[name] for name in names}
+        for name in names:
+            if name not in candidates:
+                continue
+            variable = self.variable(name)
+            literal = variable if candidates[name] else -variable
+            values = self.solver.solve([-literal])
+            if values is None:
+                self.solver.add_clause([literal])
+                continue
+            for other in list(candidates):
+                if values[self.variable(other)] != candidates[other]:
+                    del candidates[other]
+        return candidates
+
+    def model(self, assumptions=()):
+        """
+        Returns a model of every symbol that makes the added sentences
+        and the assumed sentences true, or None if there is none.
+        """
+        literals = [self.literal(sentence) for sentence in assumptions]
+        values = self.solver.solve(literals)
+        if values is None:
+            return None
+        return {name: values[variable]
+                for name, variable in self.variables.items()}
+
+
+def counter_model(knowledge, query):
+    """
+    Returns a model where knowledge is true and query is false, or None
+    if knowledge entails query.
+    """
+    formula = Formula()
+    formula.add(knowledge)
+    model = formula.model([Not(query)])
+    if model is None:
+        return None
+    symbols = knowledge.symbols() | query.symbols()
+    return {name: value for name, value in model.items() if name in symbols}
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query."""
+    return counter_model(knowledge, query) is None
+
+
+def models(knowledge, symbols=None):
+    """
+    Yields every model of knowledge over its symbols and any others
+    given, blocking each model found before searching for the next.
+    """
+    names = sorted(knowledge.symbols() | set(symbols or ()))
+    formula = Formula()
+    formula.add(knowledge)
+    variables = [formula.variable(name) for name in names]
+    while True:
+        model = formula.model()
+        if model is None:
+            return
+        yield {name: model[name] for name in names}
+
+        # At least one symbol must differ from this model
+        formula.solver.add_clause([-variable if model[name] else variable
+                                   for name, variable in zip(names,
+                                                             variables)])
+
+
+def summarize(knowledge, symbols=None):
+    """
+    Returns the Summary of knowledge, enumerating its models once.
+    """
+    count = 0
+    candidates = None
+    for model in models(knowledge, symbols):
+        count += 1
+        if candidates is None:
+            candidates = model
+        else:
+            candidates = {name: value for name, value in candidates.items()
+                          if model[name] == value}
+    return Summary(count, candidates)
+
+
+def backbone(knowledge, symbols=None):
+    """
+    Returns the value of every symbol that has the same value in all
+    models of knowledge, or None if knowledge has no models.
+
+    Each candidate value is tested by looking for a model with the
+    opposite value, and every model found rules out all the candidates
+    it disagrees with.
+    """
+    formula = Formula()
+    formula.add(knowledge)
+    return formula.backbone(knowledge.symbols() | set(symbols or ()))